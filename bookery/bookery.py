@@ -1,4 +1,5 @@
 from redbot.core import Config, app_commands, commands, checks
+from redbot.core.utils.chat_formatting import box
 from redbot.core.utils.views import SimpleMenu
 import urllib.parse
 import discord
@@ -6,6 +7,7 @@ import asyncio
 import aiohttp
 import json
 
+from .breaker import CircuitBreaker
 from .utils_bookery import *
 from .utils_discord import *
 
@@ -15,6 +17,19 @@ class Bookery(commands.Cog):
     def __init__(self, bot):
         self.config = Config.get_conf(self, identifier=806715409318936616)
         self.bot = bot
+        self.session = None
+        self.breaker = CircuitBreaker("Google Books", deadline=8)
+
+    async def cog_load(self):
+        # One pooled session for the lifetime of the cog, so searches reuse connections
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5),
+        )
+
+    async def cog_unload(self):
+        if self.session:
+            await self.session.close()
 
     # This cog does not store any End User Data
     async def red_get_data_for_user(self, *, user_id: int):
@@ -23,6 +38,12 @@ class Bookery(commands.Cog):
         pass
 
 
+    @commands.command()
+    @checks.is_owner()
+    async def bookerystatus(self, ctx):
+        """查看 Google Books API 斷路器的狀態"""
+        await ctx.send(box(self.breaker.describe()))
+
     @commands.hybrid_command(name="book", aliases=["bookery"])
     @app_commands.describe(text="搜尋書籍或書籍的詳細資訊")
     async def bookery(self, ctx, *, text):
@@ -30,7 +51,12 @@ class Bookery(commands.Cog):
         
         （來源： Google Books API ）
         """
-        results = await fetch_google_books(text)
+        results = await fetch_google_books(self.session, self.breaker, text)
+        if results is None and self.breaker.state == "open":
+            query = urllib.parse.quote(text, safe='')
+            return await ctx.send(
+                f"Google Books API 暫時無法使用，可以直接在 Google 圖書搜尋： <https://www.google.com/search?tbm=bks&q={query}>"
+            )
         if results in [None, False]:
             return await ctx.send("沒有結果")
 
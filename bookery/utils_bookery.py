@@ -1,17 +1,15 @@
-import aiohttp
 import asyncio
 import json
 
 
-async def fetch_url(url):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            reqdata = await resp.json()
-            return reqdata
+async def fetch_url(session, url):
+    async with session.get(url) as resp:
+        reqdata = await resp.json()
+        return reqdata
 
-async def fetch_google_books(text):
+async def fetch_google_books(session, breaker, text):
     try:
-        resp = await fetch_url(f"https://www.googleapis.com/books/v1/volumes?q={text}")
+        resp = await breaker.call(fetch_url, session, f"https://www.googleapis.com/books/v1/volumes?q={text}")
         if resp.get("totalItems", 0) > 0:
             return resp
         else:
@@ -7,6 +7,9 @@ import urllib.parse
 import html
 from redbot.core import commands, app_commands, Config
 from expiringdict import ExpiringDict
+from redbot.core.utils.chat_formatting import box
+
+from .breaker import CircuitBreaker, CircuitOpenError
 
 log = logging.getLogger("red.crab-cogs.boorucog")
 
@@ -14,6 +17,7 @@ EMBED_COLOR = 0xD7598B
 EMBED_ICON = "https://i.imgur.com/FeRu6Pw.png"
 IMAGE_TYPES = (".png", ".jpeg", ".jpg", ".webp", ".gif")
 TAG_BLACKLIST = ["shota", "guro", "video"]
+AUTOCOMPLETE_DEADLINE = 2.5  # Discord drops autocomplete answers after 3 seconds
 HEADERS = {
     "User-Agent": f"crab-cogs/v1 (https://github.com/hollowstrawberry/crab-cogs);"
 }
@@ -28,9 +32,23 @@ class Booru(commands.Cog):
         self.image_cache = ExpiringDict(max_len=100, max_age_seconds=24*60*60)  # channel id -> list of sent post ids
         self.config = Config.get_conf(self, identifier=62667275)
         self.config.register_global(tag_cache={})
+        self.session = None
+        self.breaker = CircuitBreaker("Gelbooru", deadline=10)
+        # Autocomplete has a much tighter budget, its timeouts shouldn't block the booru command
+        self.tag_breaker = CircuitBreaker("Gelbooru tags", deadline=AUTOCOMPLETE_DEADLINE)
 
     async def cog_load(self):
         self.tag_cache = await self.config.tag_cache()
+        # Autocomplete fires on every keystroke, keep the connection to Gelbooru alive between them
+        self.session = aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5),
+        )
+
+    async def cog_unload(self):
+        if self.session:
+            await self.session.close()
 
     async def red_delete_data_for_user(self, requester: str, user_id: int):
         pass
@@ -43,6 +61,12 @@ class Booru(commands.Cog):
             tag_cache.clear()
         await ctx.react_quietly("✅")
 
+    @commands.command()
+    @commands.is_owner()
+    async def boorustatus(self, ctx: commands.Context):
+        """查看 Gelbooru API 斷路器的狀態"""
+        await ctx.send(box(f"{self.breaker.describe()}\n\n{self.tag_breaker.describe()}"))
+
     @commands.hybrid_command(aliases=["gelbooru"])
     @app_commands.describe(tags="將自動建議標籤（請用空格分隔多個標籤）")
     async def booru(self, ctx: commands.Context, *, tags: str):
@@ -63,6 +87,9 @@ class Booru(commands.Cog):
 
         try:
             result = await self.grab_image(tags, ctx)
+        except CircuitOpenError:
+            await ctx.send("Gelbooru 暫時無法使用，請稍後再試。")
+            return
         except:
             log.exception("無法從 Gelbooru 獲取圖片")
             await ctx.send("抱歉，在從 Gelbooru 獲取圖片時發生錯誤，請稍後再試或通知管理員。")
@@ -127,6 +154,9 @@ class Booru(commands.Cog):
         else:
             try:
                 results = await self.grab_tags(last)
+            except CircuitOpenError:  # already logged when the breaker tripped
+                results = ["Error"]
+                previous = None
             except:
                 log.exception("Failed to load Gelbooru tags")
                 results = ["Error"]
@@ -137,6 +167,10 @@ class Booru(commands.Cog):
             results = [f"{previous} {res}" for res in results]
         return [discord.app_commands.Choice(name=i, value=i) for i in results]
 
+    async def fetch_json(self, url: str):
+        async with self.session.get(url) as resp:
+            return await resp.json()
+
     async def grab_tags(self, query) -> list[str]:
         if query in self.tag_cache:
             return self.tag_cache[query].split(' ')
@@ -146,9 +180,7 @@ class Booru(commands.Cog):
         api_key, user_id = api.get("api_key"), api.get("user_id")
         if api_key and user_id:
             url += f"&api_key={api_key}&user_id={user_id}"
-        async with aiohttp.ClientSession(headers=HEADERS) as session:
-            async with session.get(url) as resp:
-                data = await resp.json()
+        data = await self.tag_breaker.call(self.fetch_json, url)
         if not data or "tag" not in data:
             return []
         results = [tag["name"] for tag in data["tag"]][:20]
@@ -169,9 +201,7 @@ class Booru(commands.Cog):
         api_key, user_id = api.get("api_key"), api.get("user_id")
         if api_key and user_id:
             url += f"&api_key={api_key}&user_id={user_id}"
-        async with aiohttp.ClientSession(headers=HEADERS) as session:
-            async with session.get(url) as resp:
-                data = await resp.json()
+        data = await self.breaker.call(self.fetch_json, url)
         if not data or "post" not in data:
             return {}
         images = [img for img in data["post"] if img["file_url"].endswith(IMAGE_TYPES)]
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+
+class CircuitOpenError(Exception):
+    """斷路器開啟中，沒有呼叫上游"""
+
+
+class CircuitBreaker:
+    """
+    單一上游 API 的斷路器
+
+    每次呼叫都有自己的時間預算 (deadline)；連續 threshold 次失敗、逾時或回應太慢之後，
+    cooldown 秒內的呼叫都會直接失敗。冷卻結束後只放一個呼叫試試，其他呼叫仍直接失敗，試的那次成功才恢復正常。
+    """
+
+    def __init__(self, name, deadline, threshold=3, cooldown=60, slow=None):
+        self.name = name
+        self.deadline = deadline
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.slow = deadline / 2 if slow is None else slow
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.last_error = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    async def call(self, func, *args, deadline=None):
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial_in_flight):
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+        trial = state == "half-open"
+        if trial:
+            self._trial_in_flight = True
+        started = time.monotonic()
+        try:
+            try:
+                result = await asyncio.wait_for(func(*args), deadline or self.deadline)
+            except Exception as e:
+                self._failure(e, trial)
+                raise
+            elapsed = time.monotonic() - started
+            if elapsed > self.slow:
+                # The answer is still used, but an upstream this slow counts towards tripping
+                self._failure(f"slow response ({elapsed:.1f}s)", trial)
+            else:
+                self.failures = 0
+                self.opened_at = None
+            return result
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+    def _failure(self, error, trial=False):
+        self.last_error = str(error) or type(error).__name__
+        self.failures += 1
+        if self.failures >= self.threshold or trial:
+            self.opened_at = time.monotonic()
+
+    def describe(self):
+        lines = [
+            f"{self.name}: {self.state}",
+            f"  連續失敗: {self.failures}/{self.threshold}",
+            f"  被拒絕的呼叫: {self.rejected}",
+            f"  時間預算: {self.deadline}s",
+        ]
+        if self.state == "open":
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            lines.append(f"  {remaining:.0f} 秒後重試")
+        if self.last_error:
+            lines.append(f"  最近的錯誤: {self.last_error}")
+        return "\n".join(lines)
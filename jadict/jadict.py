@@ -1,4 +1,5 @@
 from redbot.core import Config, app_commands, commands, checks
+from redbot.core.utils.chat_formatting import box
 from redbot.core.utils.views import SimpleMenu
 import urllib.parse
 import discord
@@ -6,6 +7,7 @@ import asyncio
 import aiohttp
 import json
 
+from .breaker import CircuitBreaker
 from .jadict_utils import *
 
 class Jadict(commands.Cog):
@@ -14,6 +16,19 @@ class Jadict(commands.Cog):
     def __init__(self, bot):
         self.config = Config.get_conf(self, identifier=806715409318936616)
         self.bot = bot
+        self.session = None
+        self.breaker = CircuitBreaker("Jisho", deadline=8)
+
+    async def cog_load(self):
+        # One pooled session for the lifetime of the cog, so lookups reuse connections
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5),
+        )
+
+    async def cog_unload(self):
+        if self.session:
+            await self.session.close()
 
     # This cog does not store any End User Data
     async def red_get_data_for_user(self, *, user_id: int):
@@ -71,7 +86,7 @@ class Jadict(commands.Cog):
         > ✅  東京, toukyou, or "tokyo"
         > ✅  らーめん, raamen, or "ramen"
         """
-        jishoJson = await fetchJisho(text)
+        jishoJson = await fetchJisho(self.session, self.breaker, text)
 
         if jishoJson not in [False, None]:
             jisho_results = make_results(jishoJson)
@@ -80,10 +95,19 @@ class Jadict(commands.Cog):
         elif jishoJson is False:
             fallback_embed = await self.fallbackEmbed(ctx, text, "在 Jisho 上沒有找到內容，請嘗試其他來源")
             return await ctx.send(embed=fallback_embed)
+        elif self.breaker.state == "open":
+            fallback_embed = await self.fallbackEmbed(ctx, text, "Jisho API 暫時無法使用，請嘗試其他來源")
+            return await ctx.send(embed=fallback_embed)
         else:
             fallback_embed = await self.fallbackEmbed(ctx, text, "無法連接到 Jisho API")
             return await ctx.send(embed=fallback_embed)
 
+    @commands.command()
+    @checks.is_owner()
+    async def jadictstatus(self, ctx):
+        """查看 Jisho API 斷路器的狀態"""
+        await ctx.send(box(self.breaker.describe()))
+
     @commands.hybrid_command(name="jasearch", aliases=["jpsearch"])
     @app_commands.describe(text="搜尋日語單字或翻譯網站")
     async def jasearch(self, ctx, *, text):
@@ -1,5 +1,4 @@
 import asyncio
-import aiohttp
 import json
 
 # MIT License: https://github.com/Ryuguu-Chan/Japan-romanization
@@ -94,9 +93,9 @@ digraph_arr = [
     "ゃ", "ゅ", "ょ", "ぃ", "ぁ",
 ]
 
-async def fetchJisho(text):
+async def fetchJisho(session, breaker, text):
     try:
-        jishoJson = await makeJsonRequest(f"http://jisho.org/api/v1/search/words?keyword={text}")
+        jishoJson = await breaker.call(makeJsonRequest, session, f"https://jisho.org/api/v1/search/words?keyword={text}")
         if len(jishoJson.get("data", [])) > 0:
             return jishoJson
         else:
@@ -104,11 +103,10 @@ async def fetchJisho(text):
     except:
         return None
 
-async def makeJsonRequest(url):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            reqdata = await resp.json()
-            return reqdata
+async def makeJsonRequest(session, url):
+    async with session.get(url) as resp:
+        reqdata = await resp.json()
+        return reqdata
 
 def make_results(jishoJson):
     results = []
@@ -5,5 +5,7 @@ __red_end_user_data_statement__ = (
 )
 
 
-def setup(bot):
-    bot.add_cog(MinecraftData(bot))
+async def setup(bot):
+    cog = MinecraftData(bot)
+    await cog.initialize()
+    bot.add_cog(cog)
@@ -0,0 +1,85 @@
+import hashlib
+import time
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+import discord
+
+from .cache import MISSING, TTLCache
+
+CACHE_SIZE = 1000
+MAX_AGE = 12 * 60 * 60
+EXPIRY_MARGIN = 10 * 60  # an embed may be viewed a while after it was sent
+
+
+class AttachmentCache:
+    """
+    依照圖片內容記住上傳到 Discord 後的 CDN 網址
+
+    同一張圖片（伺服器圖示、皮膚、披風）再次出現時，embed 直接使用網址而不重新上傳；
+    Discord 的網址帶有到期時間（ex 參數），過期前就會重新上傳；
+    原本的訊息被刪除時網址會失效，但 Discord 不會拒絕這種 embed，所以要由 forget 清掉。
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.cache = TTLCache(maxsize, MAX_AGE)
+        self.messages = {}  # message id -> keys of the images uploaded with it
+
+    @staticmethod
+    def _key(data):
+        return hashlib.sha1(data).hexdigest()
+
+    def prepare(self, images):
+        """
+        images 為 {檔名: 圖片}，回傳 ({檔名: 網址}, 需要上傳的檔案)
+
+        沒有快取的圖片網址為 attachment://檔名，要跟著回傳的檔案一起送出
+        """
+        urls = {}
+        files = []
+        for filename, data in images.items():
+            entry = self.cache.get(self._key(data))
+            if entry is MISSING:
+                url = f"attachment://{filename}"
+                files.append(discord.File(BytesIO(data), filename=filename))
+            else:
+                url = entry[0]
+            urls[filename] = url
+        return urls, files
+
+    def remember(self, message, images):
+        """記下訊息裡上傳的圖片網址"""
+        now = time.time()
+        for attachment in message.attachments:
+            data = images.get(attachment.filename)
+            if data is None:
+                continue
+            ttl = MAX_AGE
+            expires = parse_qs(urlparse(attachment.url).query).get("ex")
+            if expires:
+                try:
+                    ttl = min(ttl, int(expires[0], 16) - now - EXPIRY_MARGIN)
+                except ValueError:
+                    pass
+            if ttl > 0:
+                key = self._key(data)
+                self.cache.set(key, (attachment.url, message.id), ttl)
+                self.messages.setdefault(message.id, set()).add(key)
+        if len(self.messages) > self.cache.maxsize:
+            self._prune()
+
+    def discard(self, images):
+        for data in images.values():
+            self.cache.pop(self._key(data))
+
+    def forget(self, message_ids):
+        """移除來自已刪除訊息的網址"""
+        for message_id in message_ids:
+            for key in self.messages.pop(message_id, ()):
+                self.cache.pop(key)
+
+    def _prune(self):
+        # Entries expire or get evicted inside the cache, rebuild the index from what is left
+        self.messages = {}
+        for key, (_, (_, message_id)) in self.cache.dump().items():
+            self.messages.setdefault(message_id, set()).add(key)
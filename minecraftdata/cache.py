@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    有上限、會過期的 LRU 快取
+
+    值可以是 None，用來做負向快取（例如查無此玩家）；查不到時 get 回傳 MISSING。
+    過期時間使用牆上時鐘，所以 dump 出來的內容可以存進 Config，重啟後繼續使用。
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires at, value)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+        self.misses += 1
+        return MISSING
+
+    def set(self, key, value, ttl=None):
+        self.entries[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key):
+        """移除並回傳值，沒有（或已過期）時回傳 MISSING"""
+        entry = self.entries.pop(key, None)
+        if entry is None or entry[0] <= time.time():
+            return MISSING
+        return entry[1]
+
+    def dump(self):
+        now = time.time()
+        return {key: list(entry) for key, entry in self.entries.items() if entry[0] > now}
+
+    def load(self, data):
+        now = time.time()
+        for key, (expires, value) in sorted(data.items(), key=lambda item: item[1][0]):
+            if expires > now:
+                self.entries[key] = (expires, value)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
@@ -0,0 +1,80 @@
+import asyncio
+from asyncio import TimeoutError as AsyncTimeoutError
+
+from aiohttp import ClientError
+
+from .cache import MISSING, TTLCache
+
+try:
+    from redbot import json  # support of Draper's branch
+except ImportError:
+    import json
+
+PROVIDER_TIMEOUT = 5
+CACHE_SIZE = 500
+CACHE_TTL = 30 * 60
+ERROR_TTL = 60  # retry soon when a provider was down instead of remembering "no cape"
+
+# name, url, whether the url can be shown in an embed, whether the cape is inside a JSON body
+PROVIDERS = (
+    ("Mojang", "https://crafatar.com/capes/{uuid}", True, False),
+    ("OptiFine", "http://s.optifine.net/capes/{name}.png", True, False),
+    ("LabyMod", "http://capes.labymod.net/capes/{dashed_uuid}", False, False),
+    ("MinecraftCapes", "https://minecraftcapes.net/profile/{uuid}/cape", True, False),
+    ("5zig", "http://textures.5zig.net/textures/2/{uuid}", False, True),
+)
+
+
+class CapeFinder:
+    """
+    同時向所有披風來源查詢玩家是否有披風
+
+    能用 HEAD 的來源只確認是否存在，不下載圖片；每個來源各自有逾時時間。
+    結果依照 uuid 快取，沒有披風也會快取，只有查詢失敗時快取時間較短。
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.cache = TTLCache(CACHE_SIZE, CACHE_TTL)
+
+    async def find(self, player):
+        """
+        回傳 {來源: 結果}，結果為圖片網址、True（有披風但沒有可嵌入的網址）、
+        False（沒有披風）或 None（查詢失敗）
+        """
+        capes = self.cache.get(player.uuid)
+        if capes is not MISSING:
+            return capes
+        results = await asyncio.gather(*(self._check(player, *provider) for provider in PROVIDERS))
+        capes = {provider[0]: result for provider, result in zip(PROVIDERS, results)}
+        self.cache.set(player.uuid, capes, ERROR_TTL if None in results else None)
+        return capes
+
+    async def _check(self, player, name, url, embeddable, in_json):
+        url = url.format(uuid=player.uuid, dashed_uuid=player.dashed_uuid, name=player.name)
+        try:
+            found = await asyncio.wait_for(
+                self._request("GET" if in_json else "HEAD", url, in_json), PROVIDER_TIMEOUT
+            )
+        except (ClientError, AsyncTimeoutError, ValueError, TypeError):
+            # One broken provider only makes its own result unknown
+            return None
+        return url if found and embeddable else found
+
+    async def _request(self, method, url, in_json):
+        async with self.session.request(method, url) as r:
+            if r.status == 405 and method == "HEAD":
+                return await self._request("GET", url, in_json)
+            if r.status in (204, 404):
+                return False
+            r.raise_for_status()
+            if in_json:
+                data = await r.json(content_type=None, loads=json.loads)
+                if not isinstance(data, dict):
+                    raise ValueError("Unexpected response body")
+                return "cape" in data
+            if r.content_length is None:
+                if method == "HEAD":
+                    return None  # can't tell without a body
+                return bool(await r.read())
+            return r.content_length != 0
@@ -0,0 +1,102 @@
+import asyncio
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import dns.exception
+import dns.resolver
+from mcstatus import BedrockServer, JavaServer
+
+from .cache import MISSING, TTLCache
+
+RESOLVER_THREADS = 4
+DNS_TIMEOUT = 3
+CACHE_SIZE = 500
+MIN_TTL = 30
+MAX_TTL = 6 * 60 * 60
+NO_RECORD_TTL = 5 * 60
+FAILURE_TTL = 30
+JAVA_PORT = 25565
+BEDROCK_PORT = 19132
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _ttl(answer):
+    return min(max(answer.rrset.ttl, MIN_TTL), MAX_TTL)
+
+
+class ServerResolver:
+    """
+    Minecraft 伺服器位址的 DNS 快取
+
+    Java 版依照 SRV 紀錄找出實際的主機和連接埠，基岩版則直接解析 A 紀錄。
+    結果依照紀錄的 TTL 快取，解析失敗也會短暫快取；查詢在專用的小型執行緒池裡進行，
+    不會佔用 bot 預設的 executor。
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(RESOLVER_THREADS, thread_name_prefix="mcdns")
+        self.cache = TTLCache(CACHE_SIZE, MIN_TTL)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def java(self, address):
+        return JavaServer(*await self._resolve("java", address))
+
+    async def bedrock(self, address):
+        return BedrockServer(*await self._resolve("bedrock", address))
+
+    async def _resolve(self, kind, address):
+        key = (kind, address.lower())
+        result = self.cache.get(key)
+        if result is MISSING:
+            ttl, result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._lookup, kind, address
+            )
+            self.cache.set(key, result, ttl)
+        if isinstance(result, str):  # cached failure
+            raise ValueError(result)
+        return result
+
+    def _lookup(self, kind, address):
+        try:
+            parsed = urlparse(f"//{address}")
+            host, port = parsed.hostname, parsed.port
+            if not host:
+                raise ValueError(f"Invalid address: {address!r}")
+            if kind == "java":
+                return self._lookup_java(host, port)
+            return self._lookup_bedrock(host, port)
+        except (ValueError, dns.exception.DNSException) as e:
+            return FAILURE_TTL, str(e) or type(e).__name__
+
+    @staticmethod
+    def _lookup_java(host, port):
+        if port is not None or _is_ip(host):
+            return MAX_TTL, (host, port or JAVA_PORT)
+        # The handshake has to carry the host name, so only the SRV record is resolved here
+        try:
+            answer = dns.resolver.resolve(f"_minecraft._tcp.{host}", "SRV", lifetime=DNS_TIMEOUT)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return NO_RECORD_TTL, (host, JAVA_PORT)
+        record = answer[0]
+        return _ttl(answer), (str(record.target).rstrip("."), record.port)
+
+    @staticmethod
+    def _lookup_bedrock(host, port):
+        port = port or BEDROCK_PORT
+        if _is_ip(host):
+            return MAX_TTL, (host, port)
+        try:
+            answer = dns.resolver.resolve(host, "A", lifetime=DNS_TIMEOUT)
+        except dns.resolver.NoAnswer:  # IPv6 only, let the socket resolve it
+            return NO_RECORD_TTL, (host, port)
+        return _ttl(answer), (answer[0].address, port)
@@ -1,17 +1,32 @@
+import asyncio
 import base64
-import re
+import math
+import time
 from asyncio import TimeoutError as AsyncTimeoutError
 from io import BytesIO
 from typing import Optional
 
 import aiohttp
 import discord
-from mcstatus import BedrockServer, JavaServer
-from redbot.core import commands
+import tabulate
+from mcstatus import BedrockServer
+from PIL import UnidentifiedImageError
+from redbot.core import Config, commands
+from redbot.core.data_manager import cog_data_path
 from redbot.core.i18n import Translator, cog_i18n
 from redbot.core.utils import chat_formatting as chat
 
+from .attachments import AttachmentCache
+from .cache import TTLCache
+from .capes import CapeFinder
+from .lookup import ServerResolver
 from .minecraftplayer import MCPlayer
+from .poller import POLL_INTERVAL, StatusPoller
+from .render import SkinRenderer
+from .resolver import ProfileResolver
+from .skins import SkinFetcher
+from .text import TextFormatter
+from .trend import chart, sparkline
 
 try:
     from redbot import json  # support of Draper's branch
@@ -21,6 +36,19 @@ except ImportError:
 
 _ = Translator("MinecraftData", __file__)
 
+PLAYER_CACHE_SIZE = 1000
+PLAYER_CACHE_TTL = 6 * 60 * 60
+MAX_WATCHED = 10
+SKINS_LIMIT = 25
+SKINS_CONCURRENCY = 5
+FLUSH_INTERVAL = 10 * 60
+MULTI_LIMIT = 25
+MULTI_CONCURRENCY = 10
+MULTI_TIMEOUT = 5
+MULTI_EDIT_INTERVAL = 1.5
+MULTI_ADDRESS_WIDTH = 32
+MESSAGE_LIMIT = 2000
+
 
 @cog_i18n(_)
 class MinecraftData(commands.Cog):
@@ -31,10 +59,55 @@ class MinecraftData(commands.Cog):
     # noinspection PyMissingConstructor
     def __init__(self, bot):
         self.bot = bot
-        self.session = aiohttp.ClientSession(json_serialize=json.dumps)
+        self.session = aiohttp.ClientSession(
+            json_serialize=json.dumps,
+            connector=aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5),
+        )
+        self.config = Config.get_conf(self, identifier=6557236001, force_registration=True)
+        self.config.register_global(player_cache={}, poll_interval=POLL_INTERVAL)
+        self.config.register_guild(watched=[])
+        self.player_cache = TTLCache(PLAYER_CACHE_SIZE, PLAYER_CACHE_TTL)
+        self.profiles = ProfileResolver(self.session)
+        self.skins = SkinFetcher(self.session)
+        self.skin_renderer = SkinRenderer()
+        self.capes = CapeFinder(self.session)
+        self.servers = ServerResolver()
+        self.poller = StatusPoller(self.servers)
+        self.formatter = TextFormatter()
+        self.attachments = AttachmentCache()
+        self.poll_task = None
+        self.flush_task = None
+        self.history_path = cog_data_path(self) / "history"
+
+    async def initialize(self):
+        self.player_cache.load(await self.config.player_cache())
+        self.poller.interval = await self.config.poll_interval()
+        self.poller.load(await self.config.all_guilds())
+        await self.bot.loop.run_in_executor(None, self.poller.load_history, self.history_path)
+        self.poll_task = self.bot.loop.create_task(self.poller.run())
+        self.flush_task = self.bot.loop.create_task(self.flush_loop())
+
+    async def flush_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                await self.bot.loop.run_in_executor(None, self.poller.save_history, self.history_path)
+                await self.config.player_cache.set(self.player_cache.dump())
+        except asyncio.CancelledError:
+            # Red's shutdown cancels pending tasks and then waits for them, and an unload
+            # leaves the loop running, so the last write finishes here instead of being dropped
+            await self.config.player_cache.set(self.player_cache.dump())
+            raise
 
     def cog_unload(self):
+        if self.poll_task:
+            self.poll_task.cancel()
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.poller.save_history(self.history_path)
         self.bot.loop.create_task(self.session.close())
+        self.servers.close()
 
     def format_help_for_context(self, ctx: commands.Context) -> str:  # Thanks Sinbad!
         pre_processed = super().format_help_for_context(ctx)
@@ -48,57 +121,142 @@ class MinecraftData(commands.Cog):
         """取得與 Minecraft 相關的資料"""
         pass
 
+    @minecraft.command(name="cachestats")
+    @commands.is_owner()
+    async def cache_stats(self, ctx):
+        """查看玩家名稱快取的命中率"""
+        cache = self.player_cache
+        total = cache.hits + cache.misses
+        await ctx.send(
+            chat.box(
+                _("項目: {size}/{maxsize}\n命中: {hits}\n未命中: {misses}\n命中率: {rate:.1%}").format(
+                    size=len(cache),
+                    maxsize=cache.maxsize,
+                    hits=cache.hits,
+                    misses=cache.misses,
+                    rate=cache.hits / total if total else 0,
+                )
+                + _("\nMojang 請求: {}").format(self.profiles.requests)
+            )
+        )
+
     @minecraft.command(usage="<player> [overlay layer=True]")
     @commands.bot_has_permissions(embed_links=True)
     async def skin(self, ctx, player: MCPlayer, overlay: bool = True):
         """透過玩家名稱取得 Minecraft Java 版的皮膚"""
         uuid = player.uuid
         stripname = player.name.strip("_")
-        files = []
         async with ctx.channel.typing():
             try:
-                async with self.session.get(
-                    f"https://crafatar.com/renders/head/{uuid}",
-                    params="overlay" if overlay else None,
-                ) as s:
-                    files.append(
-                        discord.File(
-                            head_file := BytesIO(await s.read()), filename=f"{stripname}_head.png"
-                        )
-                    )
-                async with self.session.get(f"https://crafatar.com/skins/{uuid}") as s:
-                    files.append(
-                        discord.File(
-                            skin_file := BytesIO(await s.read()), filename=f"{stripname}.png"
-                        )
-                    )
-                async with self.session.get(
-                    f"https://crafatar.com/renders/body/{uuid}.png",
-                    params="overlay" if overlay else None,
-                ) as s:
-                    files.append(
-                        discord.File(
-                            body_file := BytesIO(await s.read()), filename=f"{stripname}_body.png"
-                        )
-                    )
+                skin = await self.skins.fetch(uuid)
+                head, body = await self.skin_renderer.render(skin, overlay)
             except aiohttp.ClientResponseError as e:
                 await ctx.send(
                     chat.error(_("無法從 Crafatar 獲取資料: {}").format(e.message))
                 )
                 return
+            except AsyncTimeoutError:
+                await ctx.send(chat.error(_("Crafatar 回應逾時")))
+                return
+            except UnidentifiedImageError:
+                await ctx.send(chat.error(_("無法讀取這個玩家的皮膚")))
+                return
+        images = {
+            f"{stripname}_head.png": head,
+            f"{stripname}.png": skin,
+            f"{stripname}_body.png": body,
+        }
+
+        def place(em, urls):
+            em.set_author(
+                name=player.name,
+                icon_url=urls[f"{stripname}_head.png"],
+                url=f"https://crafatar.com/skins/{uuid}",
+            )
+            em.set_thumbnail(url=urls[f"{stripname}.png"])
+            em.set_image(url=urls[f"{stripname}_body.png"])
+
         em = discord.Embed(timestamp=ctx.message.created_at, color=await ctx.embed_color())
-        em.set_author(
-            name=player.name,
-            icon_url=f"attachment://{stripname}_head.png",
-            url=f"https://crafatar.com/skins/{uuid}",
-        )
-        em.set_thumbnail(url=f"attachment://{stripname}.png")
-        em.set_image(url=f"attachment://{stripname}_body.png")
         em.set_footer(text=_("由 Crafatar 提供"), icon_url="https://crafatar.com/logo.png")
-        await ctx.send(embed=em, files=files)
-        head_file.close()
-        skin_file.close()
-        body_file.close()
+        await self.send_embed_images(ctx, em, images, place)
+
+    @minecraft.command(usage="<player> <player>...")
+    @commands.cooldown(1, 30, commands.BucketType.user)
+    async def skins(self, ctx, *players: str):
+        """一次取得多個玩家的頭像，最多 25 個"""
+        names = list({name.lower(): name for name in players}.values())
+        if not names:
+            await ctx.send_help()
+            return
+        if len(names) > SKINS_LIMIT:
+            await ctx.send(chat.error(_("一次最多只能查詢 {} 個玩家").format(SKINS_LIMIT)))
+            return
+        async with ctx.channel.typing():
+            # Names that arrive together are looked up in the same bulk Mojang requests
+            results = await asyncio.gather(
+                *(MCPlayer.convert(ctx, name) for name in names), return_exceptions=True
+            )
+            found = [player for player in results if isinstance(player, MCPlayer)]
+            missing = [
+                name for name, player in zip(names, results) if not isinstance(player, MCPlayer)
+            ]
+            semaphore = asyncio.Semaphore(SKINS_CONCURRENCY)
+            skins = await asyncio.gather(*(self.fetch_skin(semaphore, p.uuid) for p in found))
+            entries = [(player.name, skin) for player, skin in zip(found, skins) if skin]
+            missing += [player.name for player, skin in zip(found, skins) if not skin]
+            if not entries:
+                await ctx.send(chat.error(_("找不到任何玩家的皮膚")))
+                return
+            image = await self.skin_renderer.render_grid(entries)
+        content = (
+            chat.warning(_("找不到或無法取得: {}").format(", ".join(missing))) if missing else None
+        )
+        await self.send_image(ctx, "skins.png", image, content)
+
+    async def fetch_skin(self, semaphore, uuid):
+        async with semaphore:
+            try:
+                return await self.skins.fetch(uuid)
+            except (aiohttp.ClientError, AsyncTimeoutError):
+                return None
+
+    async def send_embed_images(self, ctx, embed, images, place):
+        """
+        送出引用圖片的 embed，上傳過的圖片直接使用 Discord CDN 的網址
+
+        images 為 {檔名: 圖片}，place(embed, {檔名: 網址}) 負責把網址放進 embed
+        """
+        urls, files = self.attachments.prepare(images)
+        place(embed, urls)
+        try:
+            msg = await ctx.send(embed=embed, files=files or None)
+        except discord.HTTPException:
+            if len(files) == len(images):
+                raise
+            # Discord refused one of the remembered URLs, upload everything again
+            self.attachments.discard(images)
+            urls, files = self.attachments.prepare(images)
+            place(embed, urls)
+            msg = await ctx.send(embed=embed, files=files)
+        self.attachments.remember(msg, images)
+        return msg
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self.attachments.forget({payload.message_id})
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        self.attachments.forget(payload.message_ids)
+
+    async def send_image(self, ctx, filename, data, content=None):
+        """送出單張圖片，上傳過的直接送出 CDN 網址"""
+        urls, files = self.attachments.prepare({filename: data})
+        if not files:
+            await ctx.send(f"{content}\n{urls[filename]}" if content else urls[filename])
+            return
+        msg = await ctx.send(content, file=files[0])
+        self.attachments.remember(msg, {filename: data})
 
     @minecraft.group(invoke_without_command=True)
     @commands.bot_has_permissions(embed_links=True)
@@ -119,6 +277,33 @@ class MinecraftData(commands.Cog):
         em.set_image(url=f"https://crafatar.com/capes/{player.uuid}")
         await ctx.send(embed=em)
 
+    @cape.command(name="all")
+    async def cape_all(self, ctx, player: MCPlayer):
+        """同時從所有來源尋找玩家的披風"""
+        async with ctx.channel.typing():
+            capes = await self.capes.find(player)
+        lines = []
+        for provider, result in capes.items():
+            if result is None:
+                status = _("無法取得")
+            elif not result:
+                status = _("沒有")
+            elif result is True:
+                status = _("有")
+            else:
+                status = "[{}]({})".format(_("有"), result)
+            lines.append(f"**{provider}**: {status}")
+        em = discord.Embed(
+            description="\n".join(lines),
+            timestamp=ctx.message.created_at,
+            color=await ctx.embed_color(),
+        )
+        em.set_author(name=player.name)
+        image = next((result for result in capes.values() if isinstance(result, str)), None)
+        if image:
+            em.set_image(url=image)
+        await ctx.send(embed=em)
+
     @cape.command(aliases=["of"])
     async def optifine(self, ctx, player: MCPlayer):
         """透過玩家名稱取得玩家的 Optifine 披風"""
@@ -164,10 +349,7 @@ class MinecraftData(commands.Cog):
                     )
                 )
             return
-        cape = BytesIO(cape)
-        file = discord.File(cape, filename="{}.png".format(player))
-        await ctx.send(file=file)
-        cape.close()
+        await self.send_image(ctx, "{}.png".format(player), cape)
 
     @cape.command(aliases=["minecraftcapes", "couk"])
     async def mccapes(self, ctx, player: MCPlayer):
@@ -220,10 +402,7 @@ class MinecraftData(commands.Cog):
                     )
                 )
             return
-        cape = BytesIO(base64.decodebytes(cape.encode()))
-        file = discord.File(cape, filename="{}.png".format(player))
-        await ctx.send(file=file)
-        cape.close()
+        await self.send_image(ctx, "{}.png".format(player), base64.decodebytes(cape.encode()))
 
     @fivezig.command(name="animated")
     async def fivezig_animated(self, ctx, player: MCPlayer):
@@ -252,53 +431,105 @@ class MinecraftData(commands.Cog):
                     )
                 )
             return
-        cape = BytesIO(base64.decodebytes(cape.encode()))
-        file = discord.File(cape, filename="{}.png".format(player))
-        await ctx.send(file=file)
-        cape.close()
+        await self.send_image(ctx, "{}.png".format(player), base64.decodebytes(cape.encode()))
 
-    @minecraft.group()
+    @minecraft.group(invoke_without_command=True, usage="[query=False] <server IP>[:port]")
     @commands.bot_has_permissions(embed_links=True)
-    async def server(self, ctx):
-        """獲取 Minecraft 伺服器的資訊"""
-        pass
+    @commands.cooldown(1, 30, commands.BucketType.user)
+    async def server(self, ctx, query_data: Optional[bool] = False, server_ip: str = None):
+        """獲取 Minecraft 伺服器的資訊，同時嘗試 Java 版和基岩版"""
+        if server_ip is None:
+            await ctx.send_help()
+            return
+        query = asyncio.ensure_future(self.java_query(server_ip)) if query_data else None
+        answered = False
+        errors = []
+        async with ctx.channel.typing():
+            for probe in asyncio.as_completed(
+                [
+                    self.probe("java", self.java_status(server_ip)),
+                    self.probe("bedrock", self.bedrock_status(server_ip)),
+                ]
+            ):
+                edition, result = await probe
+                if isinstance(result, Exception):
+                    errors.append(result)
+                    continue
+                answered = True
+                if edition == "java":
+                    await self.send_java_status(ctx, *result, query)
+                else:
+                    await self.send_bedrock_status(ctx, server_ip, *result)
+        if query is not None and not query.done():
+            # Only reachable when the Java status failed, nobody is waiting for it
+            query.cancel()
+        if not answered:
+            if all(isinstance(e, ValueError) for e in errors):
+                await ctx.send(chat.error(_("無法解析 IP: {}").format(errors[0])))
+            else:
+                await ctx.send(chat.error(_("無法獲取伺服器狀態: Java 版和基岩版都沒有回應")))
+
+    @staticmethod
+    async def probe(edition, coro):
+        try:
+            return edition, await coro
+        except (OSError, ValueError, AsyncTimeoutError) as e:
+            return edition, e
+
+    async def java_status(self, server_ip):
+        """回傳 (server, status)，監看中的伺服器直接使用最近一次的結果"""
+        cached = self.poller.cached(server_ip)
+        if cached:
+            return cached
+        server = await self.servers.java(server_ip)
+        return server, await server.async_status()
+
+    async def java_query(self, server_ip):
+        server = await self.servers.java(server_ip)
+        return await server.async_query()
+
+    async def bedrock_status(self, server_ip):
+        server = await self.servers.bedrock(server_ip)
+        return server, await server.async_status()
 
     @server.command(usage="[query=False] <server IP>[:port]")
+    @commands.bot_has_permissions(embed_links=True)
     @commands.cooldown(1, 30, commands.BucketType.user)
     async def java(self, ctx, query_data: Optional[bool], server_ip: str):
         """獲取 Minecraft Java 版伺服器的資訊"""
-        try:
-            server: JavaServer = await self.bot.loop.run_in_executor(
-                None, JavaServer.lookup, server_ip
-            )
-        except Exception as e:
-            await ctx.send(chat.error(_("無法解析 IP: {}").format(e)))
-            return
+        if self.poller.cached(server_ip):
+            # Watched servers answer from the last poll, no need to rate limit those
+            ctx.command.reset_cooldown(ctx)
+        # The query does not depend on the status, so both run at the same time
+        query = asyncio.ensure_future(self.java_query(server_ip)) if query_data else None
+        error = None
         async with ctx.channel.typing():
             try:
-                status = await server.async_status()
-            except OSError as e:
-                await ctx.send(chat.error(_("無法獲取伺服器狀態: {}").format(e)))
-                return
+                server, status = await self.java_status(server_ip)
+            except ValueError as e:
+                error = _("無法解析 IP: {}").format(e)
             except AsyncTimeoutError:
-                await ctx.send(chat.error(_("無法獲取伺服器狀態: 連線逾時")))
-                return
-        icon_file = None
-        icon = (
-            discord.File(
-                icon_file := BytesIO(base64.b64decode(status.favicon.split(",", 1)[1])),
-                filename="icon.png",
-            )
+                error = _("無法獲取伺服器狀態: 連線逾時")
+            except OSError as e:
+                error = _("無法獲取伺服器狀態: {}").format(e)
+        if error:
+            if query is not None:
+                query.cancel()
+            await ctx.send(chat.error(error))
+            return
+        await self.send_java_status(ctx, server, status, query)
+
+    async def send_java_status(self, ctx, server, status, query=None):
+        images = (
+            {"icon.png": base64.b64decode(status.favicon.split(",", 1)[1])}
             if status.favicon
-            else None
+            else {}
         )
         embed = discord.Embed(
             title=f"{server.address.host}:{server.address.port}",
-            description=chat.box(await self.clear_mcformatting(status.description)),
+            description=chat.box(self.formatter.render(status.description, ansi=True), "ansi"),
             color=await ctx.embed_color(),
         )
-        if icon:
-            embed.set_thumbnail(url="attachment://icon.png")
         embed.add_field(name=_("延遲"), value=f"{status.latency:.2f} ms")
         embed.add_field(
             name=_("玩家人數"),
@@ -308,7 +539,7 @@ class MinecraftData(commands.Cog):
                     chat.box(
                         list(
                             chat.pagify(
-                                await self.clear_mcformatting(
+                                self.formatter.render(
                                     "\n".join([p.name for p in status.players.sample])
                                 ),
                                 page_length=992,
@@ -326,20 +557,23 @@ class MinecraftData(commands.Cog):
                 status.version.name, status.version.protocol
             ),
         )
-        msg = await ctx.send(file=icon, embed=embed)
-        if icon_file:
-            icon_file.close()
-        if query_data:
+
+        def place(embed, urls):
+            if urls:
+                embed.set_thumbnail(url=urls["icon.png"])
+
+        msg = await self.send_embed_images(ctx, embed, images, place)
+        if query is not None:
             try:
-                query = await server.async_query()
-            except OSError as e:
-                embed.set_footer(text=chat.error(_("無法獲取查詢數據: {}").format(e)))
-                await msg.edit(embed=embed)
-                return
+                query = await query
             except AsyncTimeoutError:
                 embed.set_footer(text=chat.error(_("無法獲取查詢數據: 連線逾時")))
                 await msg.edit(embed=embed)
                 return
+            except (OSError, ValueError) as e:
+                embed.set_footer(text=chat.error(_("無法獲取查詢數據: {}").format(e)))
+                await msg.edit(embed=embed)
+                return
             embed.add_field(name=_("世界"), value=f"{query.map}")
             embed.add_field(
                 name=_("軟體"),
@@ -351,29 +585,217 @@ class MinecraftData(commands.Cog):
             )
             await msg.edit(embed=embed)
 
+    @server.command(usage="<server IP>[:port] <server IP>[:port]...")
+    @commands.cooldown(1, 60, commands.BucketType.user)
+    async def multi(self, ctx, *server_ips: str):
+        """同時獲取多個 Minecraft Java 版伺服器的狀態"""
+        if not server_ips:
+            await ctx.send_help()
+            return
+        server_ips = list(dict.fromkeys(server_ips))[:MULTI_LIMIT]
+        rows = {server_ip: [server_ip, _("查詢中…"), "", "", ""] for server_ip in server_ips}
+        messages = []  # [message, content] per page of the table
+        await self.send_status_tables(ctx, messages, rows.values())
+        semaphore = asyncio.Semaphore(MULTI_CONCURRENCY)
+        last_edit = time.monotonic()
+        for result in asyncio.as_completed(
+            [self.status_row(semaphore, server_ip) for server_ip in server_ips]
+        ):
+            row = await result
+            rows[row[0]] = row
+            # Editing on every answer would hit the rate limit long before the pings finish
+            if time.monotonic() - last_edit >= MULTI_EDIT_INTERVAL:
+                await self.send_status_tables(ctx, messages, rows.values())
+                last_edit = time.monotonic()
+        await self.send_status_tables(ctx, messages, rows.values())
+
+    async def send_status_tables(self, ctx, messages, rows):
+        """把表格分頁送出或更新，messages 會記下每一頁的訊息和內容"""
+        pages = self.status_tables(rows)
+        for i, page in enumerate(pages):
+            if i == len(messages):
+                messages.append([await ctx.send(page), page])
+            elif messages[i][1] != page:
+                await messages[i][0].edit(content=page)
+                messages[i][1] = page
+        for msg, _content in messages[len(pages) :]:
+            await msg.delete()
+        del messages[len(pages) :]
+
+    async def status_row(self, semaphore, server_ip):
+        cached = self.poller.cached(server_ip)
+        if cached:
+            status = cached[1]
+        else:
+            async with semaphore:
+                try:
+                    server = await self.servers.java(server_ip)
+                    status = await asyncio.wait_for(server.async_status(), MULTI_TIMEOUT)
+                except ValueError:
+                    return [server_ip, _("無法解析"), "", "", ""]
+                except AsyncTimeoutError:
+                    return [server_ip, _("逾時"), "", "", ""]
+                except OSError:
+                    return [server_ip, _("離線"), "", "", ""]
+        return [
+            server_ip,
+            _("線上"),
+            f"{status.players.online}/{status.players.max}",
+            f"{status.latency:.0f} ms",
+            status.version.name.replace("`", "")[:20],
+        ]
+
+    @staticmethod
+    def status_table(rows):
+        return chat.box(
+            tabulate.tabulate(
+                rows, headers=[_("伺服器"), _("狀態"), _("玩家"), _("延遲"), _("版本")]
+            )
+        )
+
+    @classmethod
+    def status_tables(cls, rows):
+        """把表格切成每頁都在 Discord 訊息長度限制內的多個表格"""
+        pages = []
+        page = []
+        for row in rows:
+            address = row[0]
+            if len(address) > MULTI_ADDRESS_WIDTH:
+                address = address[: MULTI_ADDRESS_WIDTH - 1] + "…"
+            row = [address, *row[1:]]
+            if page and len(cls.status_table(page + [row])) > MESSAGE_LIMIT:
+                pages.append(cls.status_table(page))
+                page = []
+            page.append(row)
+        pages.append(cls.status_table(page))
+        return pages
+
+    @server.command(usage="<server IP>[:port]")
+    @commands.guild_only()
+    @commands.admin_or_permissions(manage_guild=True)
+    async def watch(self, ctx, server_ip: str):
+        """定期查詢這個 Java 版伺服器，查詢它時會直接使用最近一次的結果"""
+        try:
+            await self.servers.java(server_ip)
+        except ValueError as e:
+            await ctx.send(chat.error(_("無法解析 IP: {}").format(e)))
+            return
+        async with self.config.guild(ctx.guild).watched() as watched:
+            if server_ip.lower() in map(str.lower, watched):
+                await ctx.send(chat.info(_("已經在監看 {} 了").format(server_ip)))
+                return
+            if len(watched) >= MAX_WATCHED:
+                await ctx.send(
+                    chat.error(_("每個伺服器最多只能監看 {} 個 Minecraft 伺服器").format(MAX_WATCHED))
+                )
+                return
+            watched.append(server_ip)
+        self.poller.watch(ctx.guild.id, server_ip)
+        await ctx.send(chat.info(_("開始監看 {}").format(server_ip)))
+
+    @server.command(usage="<server IP>[:port]")
+    @commands.guild_only()
+    @commands.admin_or_permissions(manage_guild=True)
+    async def unwatch(self, ctx, server_ip: str):
+        """停止監看這個 Java 版伺服器"""
+        async with self.config.guild(ctx.guild).watched() as watched:
+            matches = [address for address in watched if address.lower() == server_ip.lower()]
+            if not matches:
+                await ctx.send(chat.error(_("沒有在監看 {}").format(server_ip)))
+                return
+            watched.remove(matches[0])
+        self.poller.unwatch(ctx.guild.id, server_ip)
+        await ctx.send(chat.info(_("已停止監看 {}").format(server_ip)))
+
+    @server.command()
+    @commands.guild_only()
+    async def watched(self, ctx):
+        """列出這個伺服器監看中的 Java 版伺服器"""
+        watched = await self.config.guild(ctx.guild).watched()
+        if not watched:
+            await ctx.send(chat.info(_("這個伺服器沒有監看任何 Minecraft 伺服器")))
+            return
+        lines = []
+        for address in watched:
+            cached = self.poller.cached(address)
+            history = self.poller.history.get(address.lower())
+            if cached is None:
+                state = _("離線")
+            else:
+                players = cached[1].players
+                state = _("線上 {online}/{max} 人，延遲 {latency:.0f} ms").format(
+                    online=players.online, max=players.max, latency=cached[1].latency
+                )
+            if history:
+                state += _("，在線率 {:.0%}").format(history.uptime())
+            lines.append(f"{address}: {state}")
+        await ctx.send(chat.box("\n".join(lines)))
+
     @server.command(usage="<server IP>[:port]")
+    async def trend(self, ctx, server_ip: str):
+        """查看監看中的伺服器的玩家人數與延遲趨勢"""
+        history = self.poller.history.get(server_ip.lower())
+        if not history:
+            await ctx.send(
+                chat.error(
+                    _("沒有 {ip} 的紀錄，請先使用 `{prefix}mc server watch {ip}` 監看它").format(
+                        ip=server_ip, prefix=ctx.clean_prefix
+                    )
+                )
+            )
+            return
+        # Copies, the poller keeps writing into the ring buffers while the chart is drawn
+        players = history.ordered(history.players)
+        latency = history.ordered(history.latency)
+        image = await self.bot.loop.run_in_executor(None, chart, players, latency)
+        online = [ms for ms in latency if not math.isnan(ms)]
+        content = _(
+            "過去 {hours:.1f} 小時，在線率 {uptime:.0%}，平均延遲 {latency}\n玩家人數 {spark}"
+        ).format(
+            hours=len(history) * self.poller.interval / 3600,
+            uptime=history.uptime(),
+            latency=f"{sum(online) / len(online):.0f} ms" if online else "-",
+            spark=chat.inline(sparkline(players)) if online else "-",
+        )
+        await ctx.send(content, file=discord.File(BytesIO(image), filename="trend.png"))
+
+    @server.command(name="interval")
+    @commands.is_owner()
+    async def poll_interval(self, ctx, seconds: int):
+        """設定監看中的伺服器多久查詢一次"""
+        if seconds < 30:
+            await ctx.send(chat.error(_("間隔至少要 30 秒")))
+            return
+        await self.config.poll_interval.set(seconds)
+        self.poller.interval = seconds
+        await ctx.send(chat.info(_("監看中的伺服器現在每 {} 秒查詢一次").format(seconds)))
+
+    @server.command(usage="<server IP>[:port]")
+    @commands.bot_has_permissions(embed_links=True)
     @commands.cooldown(1, 30, commands.BucketType.user)
     async def bedrock(self, ctx, server_ip: str):
         """獲取 Minecraft Bedrock 版伺服器的資訊"""
         try:
-            server: BedrockServer = await self.bot.loop.run_in_executor(
-                None, BedrockServer.lookup, server_ip
-            )
-        except Exception as e:
+            server: BedrockServer = await self.servers.bedrock(server_ip)
+        except ValueError as e:
             await ctx.send(chat.error(_("無法解析 IP: {}").format(e)))
             return
         async with ctx.channel.typing():
             try:
                 status = await server.async_status()
-            except OSError as e:
-                await ctx.send(chat.error(_("無法獲取伺服器狀態: {}").format(e)))
-                return
             except AsyncTimeoutError:
                 await ctx.send(chat.error(_("無法獲取伺服器狀態: 連線逾時")))
                 return
+            except OSError as e:
+                await ctx.send(chat.error(_("無法獲取伺服器狀態: {}").format(e)))
+                return
+        await self.send_bedrock_status(ctx, server_ip, server, status)
+
+    async def send_bedrock_status(self, ctx, server_ip, server, status):
         embed = discord.Embed(
-            title=f"{server.address.host}:{server.address.port}",
-            description=chat.box(await self.clear_mcformatting(status.motd)),
+            # The resolver hands back the IP, show what the user asked for instead
+            title=server_ip if ":" in server_ip else f"{server_ip}:{server.address.port}",
+            description=chat.box(self.formatter.render(status.motd, ansi=True), "ansi"),
             color=await ctx.embed_color(),
         )
         embed.add_field(name=_("延遲"), value=f"{status.latency:.2f} ms")
@@ -422,26 +844,3 @@ class MinecraftData(commands.Cog):
     #                 + chat.inline(str(e))
     #             )
     #         )
-
-    async def clear_mcformatting(self, formatted_str) -> str:
-        """移除 Minecraft 格式"""
-        if not isinstance(formatted_str, dict):
-            return re.sub(r"\xA7[0-9A-FK-OR]", "", formatted_str, flags=re.IGNORECASE)
-        clean = ""
-        async for text in self.gen_dict_extract("text", formatted_str):
-            clean += text
-        return re.sub(r"\xA7[0-9A-FK-OR]", "", clean, flags=re.IGNORECASE)
-
-    async def gen_dict_extract(self, key: str, var: dict):
-        if not hasattr(var, "items"):
-            return
-        for k, v in var.items():
-            if k == key:
-                yield v
-            if isinstance(v, dict):
-                async for result in self.gen_dict_extract(key, v):
-                    yield result
-            elif isinstance(v, list):
-                for d in v:
-                    async for result in self.gen_dict_extract(key, d):
-                        yield result
@@ -1,16 +1,16 @@
 from uuid import UUID
 
-from aiohttp import ClientResponseError, ContentTypeError
+from aiohttp import ClientResponseError
 from redbot.core.commands import BadArgument
 from redbot.core.i18n import Translator
 
-try:
-    from redbot import json  # support of Draper's branch
-except ImportError:
-    import json
+from .cache import MISSING
 
 _ = Translator("MinecraftData", __file__)
 
+# Unknown names are only remembered briefly, they may be registered any time
+NOT_FOUND_TTL = 5 * 60
+
 
 class MCPlayer:
     def __init__(self, name, uuid):
@@ -23,21 +23,24 @@ class MCPlayer:
 
     @classmethod
     async def convert(cls, ctx, argument):
+        cache = ctx.cog.player_cache
+        key = argument.lower()
+        cached = cache.get(key)
+        if cached is not MISSING:
+            if cached is None:
+                raise BadArgument(_("在Mojang伺服器上找不到{}").format(argument))
+            return cls(*cached)
         try:
-            async with ctx.cog.session.get(
-                f"https://api.mojang.com/users/profiles/minecraft/{argument}",
-                raise_for_status=True,
-            ) as data:
-                response_data = await data.json(loads=json.loads)
-        except ContentTypeError:
-            response_data = None
+            profile = await ctx.cog.profiles.resolve(argument)
         except ClientResponseError as e:
             raise BadArgument(_("無法從 Minecraft API獲取數據: {}").format(e.message))
-        if response_data is None or "id" not in response_data:
+        if profile is None:
+            cache.set(key, None, NOT_FOUND_TTL)
             raise BadArgument(_("在Mojang伺服器上找不到{}").format(argument))
-        uuid = str(response_data["id"])
-        name = str(response_data["name"])
+        name, uuid = profile
         try:
-            return cls(name, uuid)
+            player = cls(name, uuid)
         except ValueError:
             raise BadArgument(_("{}已找到，但UUID不正確").format(argument))
+        cache.set(key, (name, uuid))
+        return player
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import struct
+import time
+from array import array
+from asyncio import TimeoutError as AsyncTimeoutError
+
+POLL_INTERVAL = 60
+POLL_CONCURRENCY = 8
+HISTORY_SIZE = 24 * 60
+HEADER = struct.Struct("<IIIH")  # size, cursor, count, address length
+
+log = logging.getLogger("red.heycog.minecraftdata")
+
+
+class ServerHistory:
+    """固定長度的延遲與玩家人數紀錄，離線時延遲記為 NaN"""
+
+    __slots__ = ("latency", "players", "cursor", "count")
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.latency = array("f", [math.nan]) * size
+        self.players = array("H", [0]) * size
+        self.cursor = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, latency, players):
+        self.latency[self.cursor] = latency
+        self.players[self.cursor] = min(players, 0xFFFF)
+        self.cursor = (self.cursor + 1) % len(self.latency)
+        self.count = min(self.count + 1, len(self.latency))
+
+    def to_bytes(self, address):
+        address = address.encode()
+        return (
+            HEADER.pack(len(self.latency), self.cursor, self.count, len(address))
+            + address
+            + self.latency.tobytes()
+            + self.players.tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        """回傳 (address, ServerHistory)"""
+        size, cursor, count, length = HEADER.unpack_from(data)
+        offset = HEADER.size
+        if len(data) != offset + length + size * 6:  # 4 byte float + 2 byte count per sample
+            raise ValueError("Truncated history file")
+        address = data[offset : offset + length].decode()
+        offset += length
+        history = cls(size)
+        for values in (history.latency, history.players):
+            end = offset + size * values.itemsize
+            values[:] = array(values.typecode, data[offset:end])
+            offset = end
+        history.cursor = cursor
+        history.count = count
+        return address, history
+
+    def uptime(self):
+        """紀錄中伺服器在線的比例"""
+        if not self.count:
+            return 0.0
+        return sum(not math.isnan(latency) for latency in self.ordered(self.latency)) / self.count
+
+    def ordered(self, values):
+        """由舊到新排列的資料"""
+        start = self.cursor - self.count
+        if start >= 0:
+            return values[start : self.cursor]
+        return values[start:] + values[: self.cursor]
+
+
+class StatusPoller:
+    """
+    定期查詢各伺服器監看中的 Java 版伺服器
+
+    所有伺服器共用同一個排程，每輪最多同時查詢 POLL_CONCURRENCY 個；
+    同一個位址不論被幾個伺服器監看都只查一次，指令可以直接使用最近一次的結果。
+    """
+
+    def __init__(self, resolver, interval=POLL_INTERVAL):
+        self.resolver = resolver
+        self.interval = interval
+        self.watchers = {}  # address -> guild ids watching it
+        self.results = {}  # address -> (checked at, server, status or None)
+        self.history = {}  # address -> ServerHistory
+
+    def load(self, guilds):
+        for guild_id, data in guilds.items():
+            for address in data.get("watched", []):
+                self.watch(guild_id, address)
+
+    def watch(self, guild_id, address):
+        self.watchers.setdefault(address.lower(), set()).add(guild_id)
+
+    def unwatch(self, guild_id, address):
+        key = address.lower()
+        guilds = self.watchers.get(key)
+        if guilds is None:
+            return
+        guilds.discard(guild_id)
+        if not guilds:
+            del self.watchers[key]
+            self.results.pop(key, None)
+            self.history.pop(key, None)
+
+    def cached(self, address):
+        """回傳 (server, status)；沒有監看或結果太舊時回傳 None"""
+        result = self.results.get(address.lower())
+        if result is None or result[2] is None:
+            return None
+        checked, server, status = result
+        if checked + 2 * self.interval < time.monotonic():
+            return None
+        return server, status
+
+    def save_history(self, directory):
+        """把所有紀錄一次寫進 directory，每個位址一個檔案，並移除不再監看的檔案"""
+        directory.mkdir(parents=True, exist_ok=True)
+        keep = set()
+        for address, history in list(self.history.items()):
+            path = directory / f"{hashlib.sha1(address.encode()).hexdigest()}.bin"
+            keep.add(path.name)
+            temp = path.with_suffix(".tmp")
+            temp.write_bytes(history.to_bytes(address))
+            os.replace(temp, path)
+        for path in directory.glob("*.bin"):
+            if path.name not in keep:
+                path.unlink()
+
+    def load_history(self, directory):
+        for path in directory.glob("*.bin"):
+            try:
+                address, history = ServerHistory.from_bytes(path.read_bytes())
+            except (struct.error, ValueError):
+                continue
+            if address in self.watchers:
+                self.history[address] = history
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll()
+            except Exception:  # a bad round must not stop polling for every guild
+                log.exception("Status poll round failed")
+            await asyncio.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+    async def poll(self):
+        semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+        await asyncio.gather(*(self._poll_one(semaphore, address) for address in list(self.watchers)))
+
+    async def _poll_one(self, semaphore, address):
+        async with semaphore:
+            server = status = None
+            try:
+                server = await self.resolver.java(address)
+                status = await server.async_status()
+            except (OSError, ValueError, AsyncTimeoutError):
+                pass
+            except Exception:  # e.g. mcstatus raises TypeError on a malformed status payload
+                log.exception("Failed to poll %s", address)
+        if address not in self.watchers:  # unwatched while polling
+            return
+        self.results[address] = (time.monotonic(), server, status)
+        history = self.history.setdefault(address, ServerHistory())
+        if status is None:
+            history.append(math.nan, 0)
+        else:
+            history.append(status.latency, status.players.online)
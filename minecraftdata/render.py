@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
+
+HEAD_SCALE = 16
+BODY_SCALE = 8
+CACHE_SIZE = 256
+GRID_COLUMNS = 5
+GRID_HEAD = 64
+GRID_CELL = 104  # wide enough for a 16 character name in the default font
+GRID_LABEL = 16
+GRID_BACKGROUND = (47, 49, 54)
+
+# (texture origin, overlay origin, position on the 16x32 body, size) of each front face
+HEAD = ((8, 8), (40, 8), (4, 0), (8, 8))
+TORSO = ((20, 20), (20, 36), (4, 8), (8, 12))
+RIGHT_LEG = ((4, 20), (4, 36), (4, 20), (4, 12))
+LEFT_LEG = ((20, 52), (4, 52), (8, 20), (4, 12))
+
+
+def _arms(slim):
+    width = 3 if slim else 4
+    return (
+        ((44, 20), (44, 36), (4 - width, 8), (width, 12)),
+        ((36, 52), (52, 52), (12, 8), (width, 12)),
+    )
+
+
+def _crop(skin, origin, size):
+    left, top = origin
+    return skin.crop((left, top, left + size[0], top + size[1]))
+
+
+def _encode(image, scale):
+    image = image.resize((image.width * scale, image.height * scale), Image.NEAREST)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _head(skin, overlay):
+    base, layer, _, size = HEAD
+    head = _crop(skin, base, size)
+    if overlay:
+        head.alpha_composite(_crop(skin, layer, size))
+    return head
+
+
+def render_grid(entries, overlay=True):
+    """把多個玩家的頭像和名稱排成一張 PNG，entries 為 [(名稱, 原始皮膚)]"""
+    columns = min(len(entries), GRID_COLUMNS)
+    rows = -(-len(entries) // columns)
+    image = Image.new(
+        "RGBA", (columns * GRID_CELL, rows * (GRID_HEAD + GRID_LABEL) + GRID_LABEL), GRID_BACKGROUND
+    )
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for i, (name, data) in enumerate(entries):
+        left = (i % columns) * GRID_CELL
+        top = GRID_LABEL // 2 + (i // columns) * (GRID_HEAD + GRID_LABEL)
+        try:
+            skin = Image.open(BytesIO(data)).convert("RGBA")
+        except UnidentifiedImageError:
+            pass  # keep the name so the gap is explained
+        else:
+            head = _head(skin, overlay).resize((GRID_HEAD, GRID_HEAD), Image.NEAREST)
+            image.alpha_composite(head, (left + (GRID_CELL - GRID_HEAD) // 2, top))
+        width = draw.textlength(name, font=font)
+        draw.text(
+            (left + (GRID_CELL - width) / 2, top + GRID_HEAD + 2), name, fill="white", font=font
+        )
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render(data, overlay):
+    """從原始皮膚畫出正面的頭像和身體，回傳兩張 PNG"""
+    skin = Image.open(BytesIO(data)).convert("RGBA")
+    legacy = skin.height == 32  # skins from before 1.8 have no left limbs or body overlay
+    # Slim (Alex) arms are one pixel narrower, leaving this part of the texture empty
+    slim = not legacy and skin.getpixel((54, 20))[3] == 0
+    right_arm, left_arm = _arms(slim)
+    body = Image.new("RGBA", (16, 32))
+    parts = [HEAD, TORSO, right_arm, RIGHT_LEG]
+    if not legacy:
+        parts += [left_arm, LEFT_LEG]
+    for part in parts:
+        base, layer, position, size = part
+        body.alpha_composite(_crop(skin, base, size), position)
+        # Legacy skins only have the hat layer
+        if overlay and (not legacy or part is HEAD):
+            body.alpha_composite(_crop(skin, layer, size), position)
+    if legacy:
+        # The old format reuses the right limbs mirrored for the left ones
+        for right, left in ((right_arm, left_arm), (RIGHT_LEG, LEFT_LEG)):
+            part = _crop(skin, right[0], right[3]).transpose(Image.FLIP_LEFT_RIGHT)
+            body.alpha_composite(part, left[2])
+    head = body.crop((4, 0, 12, 8))
+    return _encode(head, HEAD_SCALE), _encode(body, BODY_SCALE)
+
+
+class SkinRenderer:
+    """
+    在本地把皮膚畫成頭像和身體圖
+
+    繪製在 executor 裡進行，結果依照皮膚內容的雜湊存在有上限的 LRU 裡，
+    同一張皮膚不論屬於誰都只會畫一次。
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (skin hash, overlay) -> (head PNG, body PNG)
+
+    async def render(self, data, overlay=True):
+        key = (hashlib.sha1(data).digest(), overlay)
+        images = self.cache.get(key)
+        if images is not None:
+            self.cache.move_to_end(key)
+            return images
+        images = await asyncio.get_running_loop().run_in_executor(None, render, data, overlay)
+        self.cache[key] = images
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return images
+
+    async def render_grid(self, entries, overlay=True):
+        """把多個玩家的頭像排成一張圖，在 executor 裡繪製"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, render_grid, entries, overlay
+        )
@@ -0,0 +1,70 @@
+import asyncio
+import re
+
+try:
+    from redbot import json  # support of Draper's branch
+except ImportError:
+    import json
+
+BULK_URL = "https://api.mojang.com/profiles/minecraft"
+BULK_LIMIT = 10  # Mojang rejects bulk lookups with more names than this
+BATCH_WINDOW = 0.05
+# One malformed name makes Mojang reject the whole bulk request, so those never join a batch
+VALID_NAME = re.compile(r"[A-Za-z0-9_]{1,16}")
+
+
+class ProfileResolver:
+    """
+    合併同時發生的 Mojang 玩家名稱查詢
+
+    同一個名稱同時只會有一個查詢在進行，其他人直接等同一個結果；
+    短時間內的不同名稱會合併成一次 bulk 查詢，每次最多 BULK_LIMIT 個。
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.inflight = {}  # lowercase name -> Future of (name, uuid) or None
+        self.batch = []
+        self._timer = None
+        self.requests = 0
+
+    async def resolve(self, name):
+        """回傳 (name, uuid)，找不到玩家時回傳 None；連線錯誤會原樣拋出"""
+        if not VALID_NAME.fullmatch(name):
+            return None
+        key = name.lower()
+        future = self.inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.inflight[key] = loop.create_future()
+            self.batch.append(key)
+            if len(self.batch) >= BULK_LIMIT:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(BATCH_WINDOW, self._flush)
+        # A cancelled command must not cancel the lookup for everyone else waiting on it
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.batch = self.batch, []
+        asyncio.create_task(self._lookup(batch))
+
+    async def _lookup(self, names):
+        self.requests += 1
+        try:
+            async with self.session.post(BULK_URL, json=names, raise_for_status=True) as data:
+                response_data = await data.json(loads=json.loads)
+        except Exception as e:
+            for name in names:
+                self.inflight.pop(name).set_exception(e)
+            return
+        found = {
+            profile["name"].lower(): (str(profile["name"]), str(profile["id"]))
+            for profile in response_data or []
+            if "id" in profile and "name" in profile
+        }
+        for name in names:
+            self.inflight.pop(name).set_result(found.get(name))
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+CRAFATAR = "https://crafatar.com"
+FETCH_TIMEOUT = 10
+FRESH_FOR = 10 * 60  # Crafatar itself only refreshes skins every few minutes
+MAX_BYTES = 16 * 1024 * 1024
+
+
+class CachedImage:
+    __slots__ = ("data", "etag", "last_modified")
+
+    def __init__(self, data, etag=None, last_modified=None):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class SkinFetcher:
+    """
+    取得玩家的原始皮膚
+
+    結果依照 uuid 存在以位元組數為上限的 LRU 裡。
+    FRESH_FOR 內直接使用快取，過期後以 ETag/If-Modified-Since 重新驗證，沒變就不用重新下載。
+    """
+
+    def __init__(self, session, max_bytes=MAX_BYTES, fresh_for=FRESH_FOR):
+        self.session = session
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.entries = OrderedDict()  # uuid -> (checked at, CachedImage)
+        self.size = 0
+
+    async def fetch(self, uuid):
+        """回傳皮膚的 PNG 位元組"""
+        entry = self.entries.get(uuid)
+        if entry is not None and entry[0] + self.fresh_for > time.monotonic():
+            self.entries.move_to_end(uuid)
+            return entry[1].data
+        image = await asyncio.wait_for(
+            self._get(f"{CRAFATAR}/skins/{uuid}", entry[1] if entry is not None else None),
+            FETCH_TIMEOUT,
+        )
+        self._store(uuid, image)
+        return image.data
+
+    async def _get(self, url, previous):
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+        async with self.session.get(url, headers=headers, raise_for_status=True) as s:
+            if s.status == 304 and previous is not None:
+                return previous
+            return CachedImage(
+                await s.read(), s.headers.get("ETag"), s.headers.get("Last-Modified")
+            )
+
+    def _store(self, key, image):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[1].data)
+        self.entries[key] = (time.monotonic(), image)
+        self.size += len(image.data)
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= len(evicted.data)
@@ -0,0 +1,122 @@
+import re
+from collections import OrderedDict
+
+try:
+    from redbot import json  # support of Draper's branch
+except ImportError:
+    import json
+
+CACHE_SIZE = 512
+FORMAT_CODE = re.compile(r"\xA7([0-9A-FK-OR])", re.IGNORECASE)
+
+# Discord code blocks only understand the 8 basic ANSI colours, bright variants share them
+COLORS = {
+    "black": 30,
+    "dark_blue": 34,
+    "dark_green": 32,
+    "dark_aqua": 36,
+    "dark_red": 31,
+    "dark_purple": 35,
+    "gold": 33,
+    "gray": 37,
+    "dark_gray": 30,
+    "blue": 34,
+    "green": 32,
+    "aqua": 36,
+    "red": 31,
+    "light_purple": 35,
+    "yellow": 33,
+    "white": 37,
+}
+CODE_COLORS = dict(zip("0123456789abcdef", COLORS))
+STYLE_CODES = {"l": "bold", "n": "underlined"}
+
+
+class TextFormatter:
+    """
+    把 Minecraft 的文字元件（text/extra 或 § 格式碼）轉成純文字或 ANSI 上色的文字
+
+    以迴圈依序走過元件樹，不使用遞迴；結果依照內容存在有上限的 LRU 裡，
+    監看中的伺服器每次回傳的 MOTD 都一樣，不用重複處理。
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (payload, ansi) -> text
+
+    def render(self, payload, ansi=False):
+        if hasattr(payload, "to_minecraft"):  # newer mcstatus parses the MOTD itself
+            payload = payload.to_minecraft()
+        try:
+            key = (payload if isinstance(payload, str) else json.dumps(payload, sort_keys=True), ansi)
+        except RecursionError:  # absurdly nested components still render, just without caching
+            return self._render(payload, ansi)
+        text = self.cache.get(key)
+        if text is not None:
+            self.cache.move_to_end(key)
+            return text
+        text = self.cache[key] = self._render(payload, ansi)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return text
+
+    def _render(self, payload, ansi):
+        segments = self.segments(payload)
+        if ansi:
+            return self._ansi(segments)
+        return "".join(FORMAT_CODE.sub("", text) for _, text in segments)
+
+    @staticmethod
+    def segments(payload):
+        """依照顯示順序回傳 [(樣式, 文字)]，子元件會繼承父元件的樣式"""
+        segments = []
+        stack = [(payload, {})]
+        while stack:
+            component, style = stack.pop()
+            if isinstance(component, str):
+                segments.append((style, component))
+            elif isinstance(component, list):
+                stack.extend((child, style) for child in reversed(component))
+            elif isinstance(component, dict):
+                style = dict(style)
+                for name in ("color", "bold", "underlined"):
+                    if name in component:
+                        style[name] = component[name]
+                if "text" in component:
+                    segments.append((style, str(component["text"])))
+                stack.extend((child, style) for child in reversed(component.get("extra", [])))
+        return segments
+
+    @staticmethod
+    def _ansi(segments):
+        output = []
+        current = None
+        for style, text in segments:
+            style = dict(style)
+            # Legacy codes inside the text change the style from that point on
+            for i, part in enumerate(FORMAT_CODE.split(text)):
+                if i % 2:
+                    code = part.lower()
+                    if code in CODE_COLORS:
+                        style = {"color": CODE_COLORS[code]}  # a colour code also resets formatting
+                    elif code in STYLE_CODES:
+                        style[STYLE_CODES[code]] = True
+                    elif code == "r":
+                        style = {}
+                    continue
+                if not part:
+                    continue
+                codes = [0]
+                if style.get("bold"):
+                    codes.append(1)
+                if style.get("underlined"):
+                    codes.append(4)
+                if style.get("color") in COLORS:
+                    codes.append(COLORS[style["color"]])
+                if codes != current:
+                    output.append("\x1b[{}m".format(";".join(map(str, codes))))
+                    current = codes
+                output.append(part)
+        if current is not None and current != [0]:
+            output.append("\x1b[0m")
+        return "".join(output)
@@ -0,0 +1,78 @@
+import math
+from array import array
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+SPARK_WIDTH = 40
+CHART_WIDTH = 600
+PANEL_HEIGHT = 120
+PADDING = 24
+BACKGROUND = (47, 49, 54)
+GRID = (79, 84, 92)
+PLAYERS_COLOR = (87, 242, 135)
+LATENCY_COLOR = (254, 231, 92)
+
+
+def downsample(values, width):
+    """
+    把資料平均分成 width 段並取每段的平均
+
+    資料放進單列的浮點數圖片，再用 Pillow 的 BOX 縮放一次算完，不用在 Python 裡逐段加總。
+    離線的 NaN 會讓那一段也變成 NaN，圖上就會留下空隙。
+    """
+    if len(values) <= width:
+        return list(values)
+    image = Image.frombytes("F", (len(values), 1), array("f", values).tobytes())
+    return list(array("f", image.resize((width, 1), Image.BOX).tobytes()))
+
+
+def sparkline(values, width=SPARK_WIDTH):
+    values = downsample(values, width)
+    finite = [value for value in values if not math.isnan(value)]
+    if not finite:
+        return ""
+    low, high = min(finite), max(finite)
+    scale = (len(SPARK_BLOCKS) - 1) / (high - low) if high > low else 0
+    return "".join(
+        " " if math.isnan(value) else SPARK_BLOCKS[round((value - low) * scale)]
+        for value in values
+    )
+
+
+def _panel(draw, top, values, color, label):
+    finite = [value for value in values if not math.isnan(value)]
+    high = max(finite, default=0) or 1
+    bottom = top + PANEL_HEIGHT
+    draw.rectangle((PADDING, top, CHART_WIDTH - PADDING, bottom), outline=GRID)
+    draw.text(
+        (PADDING + 4, top + 2), f"{label} (max {high:.0f})", fill=color, font=ImageFont.load_default()
+    )
+    step = (CHART_WIDTH - 2 * PADDING) / max(len(values) - 1, 1)
+    line = []
+    for i, value in enumerate(values + [math.nan]):
+        if math.isnan(value):
+            # Offline samples break the line instead of dropping it to zero
+            if len(line) > 1:
+                draw.line(line, fill=color, width=2)
+            line = []
+            continue
+        line.append((PADDING + i * step, bottom - value / high * (PANEL_HEIGHT - 16)))
+
+
+def chart(players, latency):
+    """畫出玩家人數和延遲的 PNG 圖表，兩者都是由舊到新的紀錄"""
+    width = CHART_WIDTH - 2 * PADDING
+    players = downsample(players, width)
+    latency = downsample(latency, width)
+    # Player counts of offline samples are 0, hide them the same way as the latency
+    players = [math.nan if math.isnan(ms) else count for count, ms in zip(players, latency)]
+    image = Image.new("RGB", (CHART_WIDTH, 2 * PANEL_HEIGHT + 3 * PADDING), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    # The bundled bitmap font has no CJK glyphs, so the labels stay in English
+    _panel(draw, PADDING, players, PLAYERS_COLOR, "players")
+    _panel(draw, 2 * PADDING + PANEL_HEIGHT, latency, LATENCY_COLOR, "latency ms")
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
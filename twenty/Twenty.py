@@ -23,11 +23,41 @@ SOFTWARE.
 """
 
 import asyncio
+import multiprocessing
 import random
-from copy import deepcopy as dc
+import site
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from io import BytesIO
+from typing import Optional
 
 import discord
-from redbot.core import commands
+from redbot.core import Config, commands
+from redbot.core.utils.chat_formatting import box
+
+from . import engine, solver
+from .leaderboard import Leaderboard
+from .race import MoveJournal, Race, SpawnSequence
+from .render import BoardRenderer
+from .session import GameSession, TimerWheel
+from .views import TwentyView
+
+
+MOVE_EMOJIS = {
+    "\u2B06": engine.UP,
+    "\u2B07": engine.DOWN,
+    "\u2B05": engine.LEFT,
+    "\u27A1": engine.RIGHT,
+}
+STOP_EMOJI = "\u274C"
+IDLE_TIMEOUT = 300.0
+DIRECTION_EMOJIS = {direction: emoji for emoji, direction in MOVE_EMOJIS.items()}
+HINT_BUDGET = 2.0
+AUTOPLAY_BUDGET = 0.5
+AUTOPLAY_DELAY = 1.0
+AUTOPLAY_MOVES = 500
+FLUSH_INTERVAL = 30.0
+LEADERBOARD_SIZE = 10
 
 
 class Twenty(commands.Cog):
@@ -35,333 +65,434 @@ class Twenty(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.config = Config.get_conf(self, identifier=473541068378341376, force_registration=True)
+        self.config.register_guild(reactions=False, images=False)
+        self.config.register_user(game=None)
+        self.config.register_member(best=0)
+        self.sessions = {}  # message id -> GameSession
+        self.timers = TimerWheel(IDLE_TIMEOUT, self.expire_session)
+        self._timer_task = None
+        self.leaderboard = Leaderboard()
+        # Saved games waiting to be written, user id -> {"board", "score"} or None to delete
+        self._pending_games = {}
+        self._flush_task = None
+        self.view = TwentyView(self)
+        self.solver_pool = None
+        self.renderer = None
 
     __author__ = "Neuro Assassin#4779 <@473541068378341376>"
 
-    async def red_delete_data_for_user(self, **kwargs):
-        """這個 cog 不蒐集用戶資料"""
-        return
-
-    @commands.bot_has_permissions(add_reactions=True)
-    @commands.command()
-    async def twenty(self, ctx):
-        """開始在 Discord 裡玩 2048"""
-        board = [
-            ["_", "_", "_", "_"],
-            ["_", "_", "_", "_"],
-            ["_", "_", "_", "_"],
-            ["_", "_", "_", 2],
-        ]
-        score = 0
-        total = 0
+    async def cog_load(self):
+        for guild_id, members in (await self.config.all_members()).items():
+            self.leaderboard.load(
+                guild_id, {user_id: data["best"] for user_id, data in members.items()}
+            )
+        if BoardRenderer.available:
+            self.renderer = BoardRenderer()
+        self.bot.add_view(self.view)
+        self._timer_task = asyncio.create_task(self.timers.run())
+        self._flush_task = asyncio.create_task(self.flush_loop())
+
+    async def cog_unload(self):
+        self.view.stop()
+        if self._timer_task:
+            self._timer_task.cancel()
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush_games()
+        if self.solver_pool:
+            self.solver_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def red_delete_data_for_user(self, *, requester, user_id: int):
+        self._pending_games.pop(user_id, None)
+        await self.config.user_from_id(user_id).clear()
+        for guild_id in await self.config.all_members():
+            await self.config.member_from_ids(guild_id, user_id).clear()
+            self.leaderboard.remove(guild_id, user_id)
+
+    @commands.group(invoke_without_command=True)
+    async def twenty(self, ctx, size: int = 4):
+        """開始在 Discord 裡玩 2048
+
+        可以選擇 3、4、5 或 6 格寬的棋盤，只有 4x4 的成績會列入排行榜。"""
+        if size not in engine.SIZES:
+            await ctx.send("棋盤大小只能是 3、4、5 或 6")
+            return
+        await self.start_game(ctx, engine.grid(size).new_board(), 0, size)
+
+    @twenty.command(name="resume")
+    async def twenty_resume(self, ctx):
+        """繼續上次沒玩完的遊戲"""
+        if any(s.author_id == ctx.author.id for s in self.sessions.values()):
+            await ctx.send("你已經有一局進行中的遊戲了")
+            return
+        if ctx.author.id in self._pending_games:
+            game = self._pending_games[ctx.author.id]
+        else:
+            game = await self.config.user(ctx.author).game()
+        if game is None:
+            await ctx.send(f"你沒有可以繼續的遊戲，用 `{ctx.clean_prefix}twenty` 開始新的一局吧")
+            return
+        await self.start_game(ctx, game["board"], game["score"], game.get("size", 4))
+
+    @twenty.command(name="race")
+    @commands.guild_only()
+    async def twenty_race(self, ctx, size: Optional[int] = 4, *players: discord.Member):
+        """和其他人用完全相同的方塊順序比賽 2048
+
+        所有玩家共用一個種子，結束時會重播每個人的移動紀錄來驗證成績。"""
+        if size not in engine.SIZES:
+            await ctx.send("棋盤大小只能是 3、4、5 或 6")
+            return
+        players = list({player.id: player for player in (ctx.author, *players)}.values())
+        if len(players) < 2:
+            await ctx.send("競速至少需要兩位玩家")
+            return
+        if any(player.bot for player in players):
+            await ctx.send("機器人不能參加競速")
+            return
+        await self.uses_reactions(ctx)  # fail before announcing the race, not after
+        race = Race(ctx, random.getrandbits(64), size, [player.id for player in players])
         await ctx.send(
-            "正在開啟遊戲...\n如果閒置超過五分鐘，遊戲將自動結束"
+            f"競速開始！種子 `{race.seed:016x}`\n"
+            + "參賽者：" + "、".join(player.mention for player in players)
         )
-        message = await ctx.send(f"分數: **{score}**```{self.print_board(board)}```")
-        await message.add_reaction("\u2B06")
-        await message.add_reaction("\u2B07")
-        await message.add_reaction("\u2B05")
-        await message.add_reaction("\u27A1")
-        await message.add_reaction("\u274C")
-
-        def check(reaction, user):
-            return (
-                (user.id == ctx.author.id)
-                and (str(reaction.emoji) in ["\u2B06", "\u2B07", "\u2B05", "\u27A1", "\u274C"])
-                and (reaction.message.id == message.id)
+        for player in players:
+            await self.start_game(
+                ctx, engine.grid(size).new_board(), 0, size, author=player, race=race
             )
 
-        while True:
+    @twenty.command(name="top", aliases=["leaderboard"])
+    @commands.guild_only()
+    async def twenty_top(self, ctx):
+        """查看這個伺服器的 2048 排行榜"""
+        top = self.leaderboard.top(ctx.guild.id, LEADERBOARD_SIZE)
+        if not top:
+            await ctx.send("這個伺服器還沒有人玩過 2048")
+            return
+        lines = []
+        for rank, (user_id, score) in enumerate(top, start=1):
+            member = ctx.guild.get_member(user_id)
+            name = member.display_name if member else str(user_id)
+            lines.append(f"{rank:>2}. {score:>7}  {name}")
+        await ctx.send(box("\n".join(lines)))
+
+    @twenty.command(name="hint")
+    async def twenty_hint(self, ctx):
+        """讓機器人建議你目前這局遊戲的下一步"""
+        session = next(
+            (
+                s
+                for s in self.sessions.values()
+                if s.author_id == ctx.author.id and s.ctx.channel.id == ctx.channel.id
+            ),
+            None,
+        )
+        if session is None:
+            await ctx.send("你在這個頻道沒有進行中的遊戲")
+            return
+        if session.race is not None:
+            await ctx.send("競速中不能使用提示")
+            return
+        if session.size != 4:
+            await ctx.send("提示只支援 4x4 的棋盤")
+            return
+        async with ctx.typing():
+            direction, depth = await self.solve(session.board, HINT_BUDGET)
+        if direction is None:
+            await ctx.send("已經沒有可以走的步了")
+            return
+        await ctx.send(f"建議下一步：{DIRECTION_EMOJIS[direction]}（搜尋深度 {depth}）")
+
+    @twenty.command(name="auto", aliases=["demo"])
+    @commands.max_concurrency(1, commands.BucketType.channel)
+    async def twenty_auto(self, ctx):
+        """讓機器人自己玩一局 2048 示範"""
+        board = engine.grid(4).new_board()
+        score = 0
+        message = await ctx.send(f"示範中...\n分數: **0**```{self.print_board(board)}```")
+        for _ in range(AUTOPLAY_MOVES):
+            direction, _ = await self.solve(board, AUTOPLAY_BUDGET)
+            if direction is None:
+                break
+            msg, board, total = self.execute_move(direction, board)
+            score += total
+            if msg == "Lost":
+                break
+            await message.edit(
+                content=f"示範中... {DIRECTION_EMOJIS[direction]}\n"
+                f"分數: **{score}**```{self.print_board(board)}```"
+            )
+            await asyncio.sleep(AUTOPLAY_DELAY)
+        await ctx.send(f"示範結束，最終成績{score}分！")
+
+    @commands.guild_only()
+    @commands.group()
+    @commands.admin_or_permissions(manage_guild=True)
+    async def twentyset(self, ctx):
+        """設定 2048"""
+        pass
+
+    @twentyset.command(name="reactions")
+    async def twentyset_reactions(self, ctx, toggle: bool):
+        """改用反應（表情符號）而不是按鈕來操作遊戲
+
+        適合無法使用按鈕的伺服器。"""
+        await self.config.guild(ctx.guild).reactions.set(toggle)
+        if toggle:
+            await ctx.send("之後的遊戲會使用反應操作")
+        else:
+            await ctx.send("之後的遊戲會使用按鈕操作")
+
+    @twentyset.command(name="images")
+    async def twentyset_images(self, ctx, toggle: bool):
+        """用圖片而不是文字顯示棋盤
+
+        需要安裝 Pillow。"""
+        if toggle and self.renderer is None:
+            await ctx.send("需要先安裝 Pillow 才能使用圖片棋盤")
+            return
+        await self.config.guild(ctx.guild).images.set(toggle)
+        if toggle:
+            await ctx.send("之後的遊戲會以圖片顯示棋盤")
+        else:
+            await ctx.send("之後的遊戲會以文字顯示棋盤")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        session = self.sessions.get(payload.message_id)
+        if session is None or payload.user_id != session.author_id:
+            return
+        emoji = str(payload.emoji)
+        if emoji == STOP_EMOJI:
+            # Wait for a move in progress, otherwise it would save the game again after it ended
+            async with session.lock:
+                await self.end_session(session, "遊戲結束")
+            return
+        if emoji not in MOVE_EMOJIS:
+            return
+        self.timers.touch(payload.message_id)
+        async with session.lock:
+            if self.sessions.get(payload.message_id) is not session:
+                return
             try:
-                reaction, user = await self.bot.wait_for(
-                    "reaction_add", check=check, timeout=300.0
-                )
-            except asyncio.TimeoutError:
-                await ctx.send("遊戲結束")
-                await message.delete()
+                await session.message.remove_reaction(emoji, discord.Object(payload.user_id))
+            except discord.errors.Forbidden:
+                pass
+            if self.apply_move(session, MOVE_EMOJIS[emoji]):
+                await self.end_session(session, self.lost_message(session))
+                return
+            content, file = await self.board_payload(session)
+            if file is None:
+                await session.message.edit(content=content)
+            else:
+                await session.message.edit(content=content, attachments=[file])
+
+    async def button_move(self, interaction: discord.Interaction, session, direction):
+        self.timers.touch(session.message.id)
+        async with session.lock:
+            if self.sessions.get(session.message.id) is not session:
+                await interaction.response.defer()
+                return
+            if self.apply_move(session, direction):
+                await interaction.response.defer()
+                await self.end_session(session, self.lost_message(session))
                 return
+            content, file = await self.board_payload(session)
+            if file is None:
+                await interaction.response.edit_message(content=content)
+            else:
+                await interaction.response.edit_message(content=content, attachments=[file])
+
+    async def uses_reactions(self, ctx):
+        """這個伺服器是否用反應操作遊戲；缺少加反應的權限時直接丟出錯誤"""
+        if ctx.guild is None or not await self.config.guild(ctx.guild).reactions():
+            return False
+        if not ctx.channel.permissions_for(ctx.me).add_reactions:
+            raise commands.BotMissingPermissions(["add_reactions"])
+        return True
+
+    async def start_game(self, ctx, board, score, size=4, author=None, race=None):
+        reactions = await self.uses_reactions(ctx)
+        session = GameSession(ctx, None, board, score, size, author)
+        if race is not None:
+            session.rng = SpawnSequence(race.seed)
+            session.journal = MoveJournal()
+            session.race = race
+        if ctx.guild is not None and self.renderer is not None:
+            session.image = await self.config.guild(ctx.guild).images()
+        content, file = await self.board_payload(session)
+        notice = "如果閒置超過五分鐘，遊戲將自動暫停"
+        if race is not None:
+            notice = f"<@{session.author_id}> 的競速棋盤，閒置超過五分鐘就會結束"
+        if not reactions:
+            session.message = await ctx.send(f"{notice}\n{content}", file=file, view=self.view)
+        else:
+            await ctx.send(f"正在開啟遊戲...\n{notice}")
+            session.message = await ctx.send(content, file=file)
+            for emoji in (*MOVE_EMOJIS, STOP_EMOJI):
+                await session.message.add_reaction(emoji)
+        message = session.message
+        self.sessions[message.id] = session
+        self.timers.schedule(message.id)
+        self.save_game(session)
+
+    def save_game(self, session):
+        """把遊戲排進下一批寫入，不會每一步都寫一次 Config"""
+        if session.race is not None:
+            return
+        self._pending_games[session.author_id] = {
+            "board": session.board,
+            "score": session.score,
+            "size": session.size,
+        }
+
+    async def flush_games(self):
+        pending, self._pending_games = self._pending_games, {}
+        for user_id, game in pending.items():
+            await self.config.user_from_id(user_id).game.set(game)
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush_games()
+
+    async def solve(self, board, time_budget):
+        """
+        在 process pool 裡執行 expectimax，避免卡住事件迴圈
+
+        Red 從 CogManager 的路徑載入 cog，那些路徑不在 sys.path 上，
+        所以 worker 啟動時要先把這個 cog 的上層資料夾加進去才能 import twenty.solver。
+        使用 spawn 而不是 fork，避免複製整個 bot 的行程。
+        """
+        if self.solver_pool is None:
+            self.solver_pool = ProcessPoolExecutor(
+                max_workers=2,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=site.addsitedir,
+                initargs=(str(Path(__file__).resolve().parent.parent),),
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self.solver_pool, solver.best_move, board, time_budget
+        )
+
+    def apply_move(self, session, direction):
+        """執行一步並更新遊戲，如果輸了就回傳 True"""
+        msg, nb, total = self.execute_move(direction, session.board, session.size, session.rng)
+        if session.journal is not None and nb != session.board:
+            session.journal.append(direction)
+        session.score += total
+        if msg == "Lost":
+            return True
+        session.board = nb
+        self.save_game(session)
+        return False
+
+    async def board_payload(self, session):
+        """回傳顯示棋盤用的訊息內容和附件（沒有圖片時附件是 None）"""
+        if not session.image:
+            return (
+                f"分數: **{session.score}**```{self.print_board(session.board, session.size)}```",
+                None,
+            )
+        data = await self.renderer.render(session.board, session.size)
+        return f"分數: **{session.score}**", discord.File(BytesIO(data), filename="2048.png")
+
+    def lost_message(self, session):
+        return f"我超，<@{session.author_id}>你跑哪去了。最終成績{session.score}分！"
+
+    async def expire_session(self, message_id):
+        session = self.sessions.get(message_id)
+        if session is None:
+            return
+        async with session.lock:
+            if session.race is not None:
+                await self.end_session(session, f"<@{session.author_id}> 閒置太久，競速結束")
             else:
-                try:
-                    await message.remove_reaction(str(reaction.emoji), ctx.author)
-                except discord.errors.Forbidden:
-                    pass
-                if str(reaction.emoji) == "\u2B06":
-                    msg, nb, total = self.execute_move("up", board)
-                elif str(reaction.emoji) == "\u2B07":
-                    msg, nb, total = self.execute_move("down", board)
-                elif str(reaction.emoji) == "\u2B05":
-                    msg, nb, total = self.execute_move("left", board)
-                elif str(reaction.emoji) == "\u27A1":
-                    msg, nb, total = self.execute_move("right", board)
-                elif str(reaction.emoji) == "\u274C":
-                    await ctx.send("遊戲結束")
-                    await message.delete()
-                    return
-                score += total
-                if msg == "Lost":
-                    await ctx.send(
-                        f"我超，{ctx.author.mention}你跑哪去了。最終成績{score}分！"
-                    )
-                    await message.delete()
-                    return
-                board = nb
-                await message.edit(content=f"分數: **{score}**```{self.print_board(board)}```")
-
-    def print_board(self, board):
-        col_width = max(len(str(word)) for row in board for word in row) + 2  # padding
+                await self.end_session(
+                    session,
+                    f"遊戲已暫停，用 `{session.ctx.clean_prefix}twenty resume` 繼續",
+                    finished=False,
+                )
+
+    async def end_session(self, session, content, finished=True):
+        if self.sessions.pop(session.message.id, None) is None:
+            return
+        self.timers.cancel(session.message.id)
+        if finished and session.race is None:
+            self._pending_games[session.author_id] = None
+        # Race scores go to the leaderboard only after finish_race has replayed them
+        if session.guild_id is not None and session.size == 4 and session.race is None:
+            await self.submit_score(session.guild_id, session.author_id, session.score)
+        await session.ctx.send(content)
+        try:
+            await session.message.delete()
+        except discord.NotFound:
+            pass
+        if session.race is not None and session.race.finish(
+            session.author_id, session.score, session.journal
+        ):
+            await self.finish_race(session.race)
+
+    async def submit_score(self, guild_id, user_id, score):
+        if self.leaderboard.submit(guild_id, user_id, score):
+            await self.config.member_from_ids(guild_id, user_id).best.set(score)
+
+    async def finish_race(self, race):
+        """重播每位玩家的移動紀錄來驗證成績，然後公布名次"""
+        standings = []
+        for user_id, (reported, journal) in race.results.items():
+            verified = self.replay_journal(race.seed, race.size, journal)
+            standings.append((verified, user_id, reported != verified, len(journal)))
+            if race.size == 4:
+                await self.submit_score(race.ctx.guild.id, user_id, verified)
+        standings.sort(reverse=True)
+        lines = []
+        for rank, (score, user_id, mismatch, moves) in enumerate(standings, start=1):
+            line = f"{rank}. <@{user_id}> {score} 分（{moves} 步）"
+            if mismatch:
+                line += " ⚠ 重播結果與遊戲中的分數不符"
+            lines.append(line)
+        await race.ctx.send("競速結束！\n" + "\n".join(lines))
+
+    def replay_journal(self, seed, size, journal):
+        """用相同的種子重播移動紀錄，回傳得到的分數"""
+        rng = SpawnSequence(seed)
+        board = engine.grid(size).new_board()
+        score = 0
+        for direction in journal:
+            msg, board, total = self.execute_move(direction, board, size, rng)
+            score += total
+            if msg == "Lost":
+                break
+        return score
+
+    def print_board(self, board, size=4):
+        rows = engine.grid(size).to_rows(board)
+        col_width = max(len(str(word)) for row in rows for word in row) + 2  # padding
         whole_thing = ""
-        for row in board:
+        for row in rows:
             whole_thing += "".join(str(word).ljust(col_width) for word in row) + "\n"
         return whole_thing
 
-    def execute_move(self, move, pboard):
-        board = dc(pboard)
-        total = 0
-        if move.lower() == "left":
-            nb, total = self.check_left(board)
-            for x in range(len(nb)):
-                while nb[x][0] == "_" and (nb[x][1] != "_" or nb[x][2] != "_" or nb[x][3] != "_"):
-                    nb[x][0] = nb[x][1]
-                    nb[x][1] = nb[x][2]
-                    nb[x][2] = nb[x][3]
-                    nb[x][3] = "_"
-                while nb[x][1] == "_" and (nb[x][2] != "_" or nb[x][3] != "_"):
-                    nb[x][1] = nb[x][2]
-                    nb[x][2] = nb[x][3]
-                    nb[x][3] = "_"
-                while nb[x][2] == "_" and (nb[x][3] != "_"):
-                    nb[x][2] = nb[x][3]
-                    nb[x][3] = "_"
-        if move.lower() == "right":
-            nb, total = self.check_right(board)
-            for x in range(len(nb)):
-                while nb[x][3] == "_" and (nb[x][2] != "_" or nb[x][1] != "_" or nb[x][0] != "_"):
-                    nb[x][3] = nb[x][2]
-                    nb[x][2] = nb[x][1]
-                    nb[x][1] = nb[x][0]
-                    nb[x][0] = "_"
-                while nb[x][2] == "_" and (nb[x][1] != "_" or nb[x][0] != "_"):
-                    nb[x][2] = nb[x][1]
-                    nb[x][1] = nb[x][0]
-                    nb[x][0] = "_"
-                while nb[x][1] == "_" and (nb[x][0] != "_"):
-                    nb[x][1] = nb[x][0]
-                    nb[x][0] = "_"
-        if move.lower() == "down":
-            nb = self.columize(board)
-            nb, total = self.check_down(nb)
-            for x in range(len(nb)):
-                while nb[x][0] == "_" and (nb[x][1] != "_" or nb[x][2] != "_" or nb[x][3] != "_"):
-                    nb[x][0] = nb[x][1]
-                    nb[x][1] = nb[x][2]
-                    nb[x][2] = nb[x][3]
-                    nb[x][3] = "_"
-                while nb[x][1] == "_" and (nb[x][2] != "_" or nb[x][3] != "_"):
-                    nb[x][1] = nb[x][2]
-                    nb[x][2] = nb[x][3]
-                    nb[x][3] = "_"
-                while nb[x][2] == "_" and (nb[x][3] != "_"):
-                    nb[x][2] = nb[x][3]
-                    nb[x][3] = "_"
-            nb = self.rowize(nb)
-        if move.lower() == "up":
-            nb = self.columize(board)
-            nb, total = self.check_up(nb)
-            for x in range(len(nb)):
-                while nb[x][3] == "_" and (nb[x][2] != "_" or nb[x][1] != "_" or nb[x][0] != "_"):
-                    nb[x][3] = nb[x][2]
-                    nb[x][2] = nb[x][1]
-                    nb[x][1] = nb[x][0]
-                    nb[x][0] = "_"
-                while nb[x][2] == "_" and (nb[x][1] != "_" or nb[x][0] != "_"):
-                    nb[x][2] = nb[x][1]
-                    nb[x][1] = nb[x][0]
-                    nb[x][0] = "_"
-                while nb[x][1] == "_" and (nb[x][0] != "_"):
-                    nb[x][1] = nb[x][0]
-                    nb[x][0] = "_"
-            nb = self.rowize(nb)
+    def execute_move(self, move, pboard, size=4, rng=random):
+        grid = engine.grid(size)
+        nb, total = grid.move(pboard, move.lower())
         if (
             nb != pboard
         ):  # So the user doesn't make a move that doesn't change anything, and just add a number
-            some_message, nb = self.add_number(nb)
+            some_message, nb = self.add_number(nb, size, rng)
         else:
             some_message = ""
-        if some_message.startswith("Lost"):
+        if some_message.startswith("Lost") or not grid.can_move(nb):
             return "Lost", nb, total
         else:
             return "", nb, total
 
-    def add_number(self, board):
-        try:
-            row = random.randint(0, 3)
-        except RecursionError:
+    def add_number(self, board, size=4, rng=random):
+        if isinstance(rng, SpawnSequence):
+            rng = rng.next()
+        nb = engine.grid(size).spawn_tile(board, rng)
+        if nb is None:
             return "Lost", board
-        if "_" in board[row]:
-            number_of_zeroes = board[row].count("_")
-            if number_of_zeroes == 1:
-                column = board[row].index("_")
-            else:
-                column = random.randint(0, 3)
-                while board[row][column] != "_":
-                    column = random.randint(0, 3)
-        else:
-            result, board = self.add_number(board)
-            return result, board
-        joining = random.randint(0, 100)
-        if joining < 85:
-            joining = 2
-        else:
-            joining = 4
-        board[row][column] = joining
-        return "", board
-
-    def columize(self, board):
-        new_board = [[], [], [], []]
-        # Make first column
-        new_board[0].append(board[3][0])
-        new_board[0].append(board[2][0])
-        new_board[0].append(board[1][0])
-        new_board[0].append(board[0][0])
-        # Make second column
-        new_board[1].append(board[3][1])
-        new_board[1].append(board[2][1])
-        new_board[1].append(board[1][1])
-        new_board[1].append(board[0][1])
-        # Make third column
-        new_board[2].append(board[3][2])
-        new_board[2].append(board[2][2])
-        new_board[2].append(board[1][2])
-        new_board[2].append(board[0][2])
-        # Make fourth column
-        new_board[3].append(board[3][3])
-        new_board[3].append(board[2][3])
-        new_board[3].append(board[1][3])
-        new_board[3].append(board[0][3])
-        board = new_board
-        return board
-
-    def rowize(self, board):
-        new_board = [[], [], [], []]
-        # Make first row
-        new_board[0].append(board[0][3])
-        new_board[0].append(board[1][3])
-        new_board[0].append(board[2][3])
-        new_board[0].append(board[3][3])
-        # Make second row
-        new_board[1].append(board[0][2])
-        new_board[1].append(board[1][2])
-        new_board[1].append(board[2][2])
-        new_board[1].append(board[3][2])
-        # Make third row
-        new_board[2].append(board[0][1])
-        new_board[2].append(board[1][1])
-        new_board[2].append(board[2][1])
-        new_board[2].append(board[3][1])
-        # Make fourth row
-        new_board[3].append(board[0][0])
-        new_board[3].append(board[1][0])
-        new_board[3].append(board[2][0])
-        new_board[3].append(board[3][0])
-        board = new_board
-        return board
-
-    def check_left(self, board):
-        total = 0
-        for x in range(len(board)):
-            for y in range(len(board[x])):
-                try:
-                    if board[x][y + 1] != "_":
-                        if board[x][y] == board[x][y + 1]:
-                            board[x][y] = board[x][y] + board[x][y + 1]
-                            total += board[x][y]
-                            board[x][y + 1] = "_"
-                    elif board[x][y + 2] != "_":
-                        if board[x][y] == board[x][y + 2]:
-                            board[x][y] = board[x][y] + board[x][y + 2]
-                            total += board[x][y]
-                            board[x][y + 2] = "_"
-                    elif board[x][y + 3] != "_":
-                        if board[x][y] == board[x][y + 3]:
-                            board[x][y] = board[x][y] + board[x][y + 3]
-                            total += board[x][y]
-                            board[x][y + 3] = "_"
-                except IndexError:
-                    pass
-        return board, total
-
-    def check_right(self, board):
-        total = 0
-        for x in range(len(board)):
-            board[x].reverse()
-            for y in range(len(board[x])):
-                try:
-                    if board[x][y + 1] != "_":
-                        if board[x][y] == board[x][y + 1]:
-                            board[x][y] = board[x][y] + board[x][y + 1]
-                            total += board[x][y]
-                            board[x][y + 1] = "_"
-                    elif board[x][y + 2] != "_":
-                        if board[x][y] == board[x][y + 2]:
-                            board[x][y] = board[x][y] + board[x][y + 2]
-                            total += board[x][y]
-                            board[x][y + 2] = "_"
-                    elif board[x][y + 3] != "_":
-                        if board[x][y] == board[x][y + 3]:
-                            board[x][y] = board[x][y] + board[x][y + 3]
-                            total += board[x][y]
-                            board[x][y + 3] = "_"
-                except IndexError:
-                    pass
-            board[x].reverse()
-        return board, total
-
-    def check_up(self, board):
-        total = 0
-        for x in range(len(board)):
-            board[x].reverse()
-            for y in range(len(board[x])):
-                try:
-                    if board[x][y + 1] != "_":
-                        if board[x][y] == board[x][y + 1]:
-                            board[x][y] = board[x][y] + board[x][y + 1]
-                            total += board[x][y]
-                            board[x][y + 1] = "_"
-                    elif board[x][y + 2] != "_":
-                        if board[x][y] == board[x][y + 2]:
-                            board[x][y] = board[x][y] + board[x][y + 2]
-                            total += board[x][y]
-                            board[x][y + 2] = "_"
-                    elif board[x][y + 3] != "_":
-                        if board[x][y] == board[x][y + 3]:
-                            board[x][y] = board[x][y] + board[x][y + 3]
-                            total += board[x][y]
-                            board[x][y + 3] = "_"
-                except IndexError:
-                    pass
-            board[x].reverse()
-        return board, total
-
-    def check_down(self, board):
-        total = 0
-        for x in range(len(board)):
-            for y in range(len(board[x])):
-                try:
-                    if board[x][y + 1] != "_":
-                        if board[x][y] == board[x][y + 1]:
-                            board[x][y] = board[x][y] + board[x][y + 1]
-                            total += board[x][y]
-                            board[x][y + 1] = "_"
-                    elif board[x][y + 2] != "_":
-                        if board[x][y] == board[x][y + 2]:
-                            board[x][y] = board[x][y] + board[x][y + 2]
-                            total += board[x][y]
-                            board[x][y + 2] = "_"
-                    elif board[x][y + 3] != "_":
-                        if board[x][y] == board[x][y + 3]:
-                            board[x][y] = board[x][y] + board[x][y + 3]
-                            total += board[x][y]
-                            board[x][y + 3] = "_"
-                except IndexError:
-                    pass
-        return board, total
+        return "", nb
@@ -1,7 +1,7 @@
 from .Twenty import Twenty
 
 __red_end_user_data_statement__ = (
-    "This cog does not persistently store data or metadata about users."
+    "This cog stores each user's unfinished 2048 game and their best score in each server."
 )
 
 
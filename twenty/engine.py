@@ -0,0 +1,301 @@
+"""
+2048 的位元棋盤引擎
+
+整個 4x4 棋盤被壓縮成一個 64 位元整數，每一格佔 4 位元，存放方塊的指數
+（0 是空格，1 是 2，2 是 4，以此類推）。第 r 列第 c 行的格子位於第
+4 * (4 * r + c) 位元，所以每一列剛好是一個 16 位元的值。
+
+每一種可能的列（共 65536 種）往左、往右滑動後的結果與得分都在載入時預先算好，
+上下移動則是先轉置棋盤再套用同一張表。
+
+其他大小的棋盤由 Grid 處理，見下方說明。
+"""
+
+import random
+from array import array
+from functools import lru_cache
+
+UP = "up"
+DOWN = "down"
+LEFT = "left"
+RIGHT = "right"
+MOVES = (UP, DOWN, LEFT, RIGHT)
+
+ROW_MASK = 0xFFFF
+CELL_LOW_BITS = 0x1111111111111111
+MAX_RANK = 0xF  # 32768, the largest tile a nibble can hold
+SIZES = (3, 4, 5, 6)
+TABLE_LIMIT = 1 << 16  # Lines with more states than this are slid on demand instead
+
+
+def _slide_row(line):
+    """把一列往索引 0 的方向滑動並合併，回傳新的列和得分"""
+    tiles = [rank for rank in line if rank]
+    merged = []
+    gained = 0
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] != MAX_RANK:
+            merged.append(tiles[i] + 1)
+            gained += 1 << (tiles[i] + 1)
+            i += 2
+        else:
+            merged.append(tiles[i])
+            i += 1
+    return merged + [0] * (len(line) - len(merged)), gained
+
+
+def _pack_row(line):
+    return line[0] | (line[1] << 4) | (line[2] << 8) | (line[3] << 12)
+
+
+def _slide_key(key, size):
+    """_slide_row 的壓縮版本：輸入和輸出都是每格 4 位元的整數"""
+    moved, gained = _slide_row([(key >> (4 * i)) & 0xF for i in range(size)])
+    result = 0
+    for i, rank in enumerate(moved):
+        result |= rank << (4 * i)
+    return result, gained
+
+
+def _build_tables():
+    left = [0] * 65536
+    right = [0] * 65536
+    score = [0] * 65536
+    stuck = [False] * 65536
+    for row in range(65536):
+        line = [(row >> 0) & 0xF, (row >> 4) & 0xF, (row >> 8) & 0xF, (row >> 12) & 0xF]
+        moved, gained = _slide_row(line)
+        left[row] = _pack_row(moved)
+        # A row scores the same whichever way it slides, only the layout differs
+        score[row] = gained
+        moved, _ = _slide_row(line[::-1])
+        right[row] = _pack_row(moved[::-1])
+        stuck[row] = left[row] == row and right[row] == row
+    return left, right, score, stuck
+
+
+# ROW_STUCK marks rows that neither a left nor a right slide can change
+ROW_LEFT, ROW_RIGHT, ROW_SCORE, ROW_STUCK = _build_tables()
+
+
+def transpose(board):
+    """轉置棋盤（第 r 列第 c 行與第 c 列第 r 行互換）"""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def _apply_rows(board, table):
+    result = 0
+    total = 0
+    for shift in (0, 16, 32, 48):
+        row = (board >> shift) & ROW_MASK
+        result |= table[row] << shift
+        total += ROW_SCORE[row]
+    return result, total
+
+
+def move(board, direction):
+    """執行一次移動，回傳新的棋盤和這一步的得分"""
+    if direction == LEFT:
+        return _apply_rows(board, ROW_LEFT)
+    if direction == RIGHT:
+        return _apply_rows(board, ROW_RIGHT)
+    if direction == UP:
+        result, total = _apply_rows(transpose(board), ROW_LEFT)
+        return transpose(result), total
+    if direction == DOWN:
+        result, total = _apply_rows(transpose(board), ROW_RIGHT)
+        return transpose(result), total
+    raise ValueError(f"Unknown move: {direction}")
+
+
+def get_rank(board, row, column):
+    return (board >> (4 * (4 * row + column))) & 0xF
+
+
+def set_rank(board, row, column, rank):
+    shift = 4 * (4 * row + column)
+    return (board & ~(0xF << shift)) | (rank << shift)
+
+
+def empty_cells(board, low_bits=CELL_LOW_BITS):
+    """每個空格在它那 4 位元的最低位元設為 1 的遮罩"""
+    occupied = board | (board >> 1)
+    occupied |= occupied >> 2
+    return ~occupied & low_bits
+
+
+def spawn_tile(board, low_bits=CELL_LOW_BITS, rng=random):
+    """
+    在空格放上一個 2 或 4，回傳新的棋盤；如果沒有空格就回傳 None
+
+    從所有空格中均勻選一格，有 85/101 的機率是 2，其餘是 4。
+    low_bits 是每一格最低位元的遮罩，預設為 4x4 棋盤；
+    rng 可以換成有種子的 random.Random 讓結果可以重現。
+    """
+    empty = empty_cells(board, low_bits)
+    count = bin(empty).count("1")
+    if not count:
+        return None
+    # The value is drawn first so it doesn't depend on how many bits the position draw used
+    rank = 1 if rng.randint(0, 100) < 85 else 2
+    for _ in range(rng.randrange(count)):
+        empty &= empty - 1  # Drop the lowest empty cell
+    shift = (empty & -empty).bit_length() - 1
+    return board | (rank << shift)
+
+
+def can_move(board):
+    """還有沒有任何合法的移動"""
+    if empty_cells(board):
+        return True
+    transposed = transpose(board)
+    for shift in (0, 16, 32, 48):
+        if not ROW_STUCK[(board >> shift) & ROW_MASK]:
+            return True
+        if not ROW_STUCK[(transposed >> shift) & ROW_MASK]:
+            return True
+    return False
+
+
+def to_rows(board):
+    """把棋盤轉回以 "_" 表示空格的二維串列，方便顯示"""
+    return [
+        [(1 << rank) if (rank := get_rank(board, r, c)) else "_" for c in range(4)]
+        for r in range(4)
+    ]
+
+
+def from_rows(rows):
+    """to_rows 的反向操作"""
+    board = 0
+    for r, line in enumerate(rows):
+        for c, value in enumerate(line):
+            if value != "_":
+                board = set_rank(board, r, c, int(value).bit_length() - 1)
+    return board
+
+
+class Grid:
+    """
+    N×N 棋盤的規則
+
+    棋盤一樣是每格 4 位元的壓縮整數，第 r 列第 c 行位於第 4 * (N * r + c) 位元。
+    移動時把棋盤攤平成一個 array，依照預先算好的索引取出每一列或每一行，
+    交給同一個滑動合併核心。一條線的狀態數（16 ** N）不超過 TABLE_LIMIT 時，
+    核心的結果會整張預先算好；否則邊算邊存進有上限的快取。
+    4x4 直接使用上面的位元棋盤。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.low_bits = sum(1 << (4 * i) for i in range(self.cells))
+        indexes = range(size)
+        # Each line lists its flat indexes in the order tiles slide towards
+        self.lines = {
+            LEFT: [[size * r + c for c in indexes] for r in indexes],
+            RIGHT: [[size * r + c for c in reversed(indexes)] for r in indexes],
+            UP: [[size * r + c for r in indexes] for c in indexes],
+            DOWN: [[size * r + c for r in reversed(indexes)] for c in indexes],
+        }
+        if size == 4:
+            self._slide = None
+        elif 16**size <= TABLE_LIMIT:
+            self._slide = [_slide_key(key, size) for key in range(16**size)].__getitem__
+        else:
+            self._slide = lru_cache(maxsize=TABLE_LIMIT)(lambda key: _slide_key(key, size))
+
+    def unpack(self, board):
+        return array("B", [(board >> (4 * i)) & 0xF for i in range(self.cells)])
+
+    def pack(self, flat):
+        board = 0
+        for i, rank in enumerate(flat):
+            board |= rank << (4 * i)
+        return board
+
+    def _line_key(self, flat, line):
+        key = 0
+        for k, index in enumerate(line):
+            key |= flat[index] << (4 * k)
+        return key
+
+    def move(self, board, direction):
+        """執行一次移動，回傳新的棋盤和這一步的得分"""
+        if self.size == 4:
+            return move(board, direction)
+        if direction not in self.lines:
+            raise ValueError(f"Unknown move: {direction}")
+        flat = self.unpack(board)
+        total = 0
+        for line in self.lines[direction]:
+            moved, gained = self._slide(self._line_key(flat, line))
+            total += gained
+            for k, index in enumerate(line):
+                flat[index] = (moved >> (4 * k)) & 0xF
+        return self.pack(flat), total
+
+    def can_move(self, board):
+        """還有沒有任何合法的移動"""
+        if self.size == 4:
+            return can_move(board)
+        if empty_cells(board, self.low_bits):
+            return True
+        # On a full board any adjacent pair also shows up as a left or up merge
+        flat = self.unpack(board)
+        for line in self.lines[LEFT] + self.lines[UP]:
+            key = self._line_key(flat, line)
+            if self._slide(key)[0] != key:
+                return True
+        return False
+
+    def spawn_tile(self, board, rng=random):
+        return spawn_tile(board, self.low_bits, rng)
+
+    def get_rank(self, board, row, column):
+        return (board >> (4 * (self.size * row + column))) & 0xF
+
+    def set_rank(self, board, row, column, rank):
+        shift = 4 * (self.size * row + column)
+        return (board & ~(0xF << shift)) | (rank << shift)
+
+    def new_board(self):
+        """開局的棋盤：右下角一個 2"""
+        return self.set_rank(0, self.size - 1, self.size - 1, 1)
+
+    def to_rows(self, board):
+        """把棋盤轉回以 "_" 表示空格的二維串列，方便顯示"""
+        return [
+            [
+                (1 << rank) if (rank := self.get_rank(board, r, c)) else "_"
+                for c in range(self.size)
+            ]
+            for r in range(self.size)
+        ]
+
+    def from_rows(self, rows):
+        """to_rows 的反向操作"""
+        board = 0
+        for r, line in enumerate(rows):
+            for c, value in enumerate(line):
+                if value != "_":
+                    board = self.set_rank(board, r, c, int(value).bit_length() - 1)
+        return board
+
+
+_GRIDS = {}
+
+
+def grid(size):
+    """取得某個大小的 Grid，每種大小只建立一次"""
+    if size not in _GRIDS:
+        _GRIDS[size] = Grid(size)
+    return _GRIDS[size]
@@ -0,0 +1,42 @@
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    """
+    每個伺服器的最高分排行榜
+
+    每個伺服器各自維護一個依 (-分數, 用戶 ID) 排序的串列，
+    更新用 bisect 定位，取前 N 名只需要切片，不用掃過所有人。
+    """
+
+    def __init__(self):
+        self.entries = {}  # guild id -> sorted [(-score, user id)]
+        self.best = {}  # (guild id, user id) -> score
+
+    def load(self, guild_id, scores):
+        """從 {用戶 ID: 分數} 重建某個伺服器的排行榜"""
+        self.entries[guild_id] = sorted((-score, user_id) for user_id, score in scores.items())
+        for user_id, score in scores.items():
+            self.best[(guild_id, user_id)] = score
+
+    def submit(self, guild_id, user_id, score):
+        """記錄一個分數，如果刷新了個人最高分就回傳 True"""
+        previous = self.best.get((guild_id, user_id), 0)
+        if score <= previous:
+            return False
+        entries = self.entries.setdefault(guild_id, [])
+        if previous:
+            index = bisect_left(entries, (-previous, user_id))
+            del entries[index]
+        insort(entries, (-score, user_id))
+        self.best[(guild_id, user_id)] = score
+        return True
+
+    def remove(self, guild_id, user_id):
+        previous = self.best.pop((guild_id, user_id), None)
+        if previous:
+            entries = self.entries[guild_id]
+            del entries[bisect_left(entries, (-previous, user_id))]
+
+    def top(self, guild_id, count=10):
+        return [(user_id, -score) for score, user_id in self.entries.get(guild_id, [])[:count]]
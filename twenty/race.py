@@ -0,0 +1,71 @@
+import random
+
+from . import engine
+
+MOVE_CODES = {direction: code for code, direction in enumerate(engine.MOVES)}
+
+
+class SpawnSequence:
+    """
+    競速用的方塊來源
+
+    第 k 個新方塊只由 (seed, k) 決定，不受之前抽了多少亂數影響，
+    所以走法不同的玩家拿到的第 k 個方塊數值仍然相同。
+    """
+
+    __slots__ = ("seed", "spawned")
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.spawned = 0
+
+    def next(self):
+        rng = random.Random(f"{self.seed}:{self.spawned}")
+        self.spawned += 1
+        return rng
+
+
+class MoveJournal:
+    """每步只佔 2 位元的移動紀錄，只記下真的改變了棋盤的移動"""
+
+    __slots__ = ("data", "length")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.length = 0
+
+    def append(self, direction):
+        offset = self.length % 4
+        if not offset:
+            self.data.append(0)
+        self.data[-1] |= MOVE_CODES[direction] << (2 * offset)
+        self.length += 1
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield engine.MOVES[(self.data[i // 4] >> (2 * (i % 4))) & 0b11]
+
+
+class Race:
+    """
+    一場多人 2048 競速
+
+    所有玩家使用同一個種子，所以只要走法相同，出現的方塊也會完全相同。
+    每個玩家的成績在結束時以紀錄重播驗證，而不是直接相信遊戲中的狀態。
+    """
+
+    def __init__(self, ctx, seed, size, player_ids):
+        self.ctx = ctx
+        self.seed = seed
+        self.size = size
+        self.waiting = set(player_ids)
+        self.results = {}  # user id -> (reported score, MoveJournal)
+
+    def finish(self, user_id, score, journal):
+        """記錄一位玩家的結果，所有人都結束時回傳 True"""
+        self.waiting.discard(user_id)
+        self.results[user_id] = (score, journal)
+        return not self.waiting
@@ -0,0 +1,116 @@
+import asyncio
+from collections import OrderedDict
+from io import BytesIO
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Pillow is optional, the text board still works without it
+    Image = None
+
+from . import engine
+
+TILE_SIZE = 96
+GAP = 12
+BACKGROUND = (187, 173, 160)
+TILE_COLORS = [
+    (205, 193, 180),  # empty
+    (238, 228, 218),  # 2
+    (237, 224, 200),  # 4
+    (242, 177, 121),  # 8
+    (245, 149, 99),  # 16
+    (246, 124, 95),  # 32
+    (246, 94, 59),  # 64
+    (237, 207, 114),  # 128
+    (237, 204, 97),  # 256
+    (237, 200, 80),  # 512
+    (237, 197, 63),  # 1024
+    (237, 194, 46),  # 2048
+    (60, 58, 50),  # 4096 and above
+    (60, 58, 50),
+    (60, 58, 50),
+    (60, 58, 50),
+]
+DARK_TEXT = (119, 110, 101)
+LIGHT_TEXT = (249, 246, 242)
+
+
+def _font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:  # Pillow < 10.1 only ships the fixed-size bitmap font
+            return ImageFont.load_default()
+
+
+class BoardRenderer:
+    """
+    把棋盤畫成 PNG
+
+    16 種方塊在建立時就畫進一張圖集，之後每個棋盤只是把圖集裡的方塊貼上去。
+    編碼好的 PNG 依照棋盤大小和壓縮後的棋盤整數存在有上限的 LRU 裡，
+    重複的局面不用重畫。
+    """
+
+    available = Image is not None
+
+    def __init__(self, cache_size=1024):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (size, packed board) -> PNG bytes
+        self.atlas = self._build_atlas()
+        self.tiles = [
+            self.atlas.crop((rank * TILE_SIZE, 0, (rank + 1) * TILE_SIZE, TILE_SIZE))
+            for rank in range(16)
+        ]
+        self.backgrounds = {
+            size: Image.new("RGB", (size * (TILE_SIZE + GAP) + GAP,) * 2, BACKGROUND)
+            for size in engine.SIZES
+        }
+
+    def _build_atlas(self):
+        atlas = Image.new("RGB", (16 * TILE_SIZE, TILE_SIZE), BACKGROUND)
+        draw = ImageDraw.Draw(atlas)
+        for rank in range(16):
+            left = rank * TILE_SIZE
+            draw.rounded_rectangle(
+                (left, 0, left + TILE_SIZE - 1, TILE_SIZE - 1), radius=6, fill=TILE_COLORS[rank]
+            )
+            if not rank:
+                continue
+            text = str(1 << rank)
+            font = _font({1: 48, 2: 48, 3: 40, 4: 32}.get(len(text), 26))
+            x0, y0, x1, y1 = draw.textbbox((0, 0), text, font=font)
+            draw.text(
+                (left + (TILE_SIZE - x1 - x0) / 2, (TILE_SIZE - y1 - y0) / 2),
+                text,
+                fill=DARK_TEXT if rank <= 2 else LIGHT_TEXT,
+                font=font,
+            )
+        return atlas
+
+    def _encode(self, board, size):
+        grid = engine.grid(size)
+        image = self.backgrounds[size].copy()
+        for row in range(size):
+            for column in range(size):
+                image.paste(
+                    self.tiles[grid.get_rank(board, row, column)],
+                    (GAP + column * (TILE_SIZE + GAP), GAP + row * (TILE_SIZE + GAP)),
+                )
+        buffer = BytesIO()
+        image.save(buffer, format="PNG", optimize=False)
+        return buffer.getvalue()
+
+    async def render(self, board, size=4):
+        """回傳棋盤的 PNG；沒有快取時在 executor 裡繪製，避免卡住事件迴圈"""
+        key = (size, board)
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache.move_to_end(key)
+            return data
+        data = await asyncio.get_running_loop().run_in_executor(None, self._encode, board, size)
+        self.cache[key] = data
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return data
@@ -0,0 +1,91 @@
+import asyncio
+import math
+import random
+import time
+
+
+class GameSession:
+    """一局進行中的 2048 遊戲"""
+
+    __slots__ = (
+        "ctx",
+        "message",
+        "author_id",
+        "guild_id",
+        "board",
+        "score",
+        "size",
+        "image",
+        "rng",
+        "journal",
+        "race",
+        "lock",
+    )
+
+    def __init__(self, ctx, message, board, score=0, size=4, author=None):
+        self.ctx = ctx
+        self.message = message
+        self.author_id = (author or ctx.author).id
+        self.guild_id = ctx.guild.id if ctx.guild else None
+        self.board = board
+        self.score = score
+        self.size = size
+        self.image = False
+        # Races give each session its own SpawnSequence and a journal to verify the score with
+        self.rng = random
+        self.journal = None
+        self.race = None
+        # Reactions arrive as independent events, moves on one board must not interleave
+        self.lock = asyncio.Lock()
+
+
+class TimerWheel:
+    """
+    所有遊戲共用的閒置計時器
+
+    每個 key 依照到期時間放進環狀的時間槽，背景工作每 resolution 秒前進一格，
+    只檢查當下那一格。touch 只會更新到期時間，舊的槽位在輪到時才重新排入，
+    所以每一步移動都是 O(1)，不用為每局遊戲各開一個計時器。
+    """
+
+    def __init__(self, timeout, callback, resolution=5.0):
+        self.timeout = timeout
+        self.resolution = resolution
+        self.callback = callback
+        self.slots = [set() for _ in range(math.ceil(timeout / resolution) + 1)]
+        self.cursor = 0
+        self.deadlines = {}
+        self.tasks = set()  # running callbacks, the event loop only keeps weak references
+
+    def _insert(self, key, delay):
+        ticks = max(1, math.ceil(delay / self.resolution))
+        self.slots[(self.cursor + ticks) % len(self.slots)].add(key)
+
+    def schedule(self, key):
+        self.deadlines[key] = time.monotonic() + self.timeout
+        self._insert(key, self.timeout)
+
+    def touch(self, key):
+        if key in self.deadlines:
+            self.deadlines[key] = time.monotonic() + self.timeout
+
+    def cancel(self, key):
+        self.deadlines.pop(key, None)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.resolution)
+            self.cursor = (self.cursor + 1) % len(self.slots)
+            due, self.slots[self.cursor] = self.slots[self.cursor], set()
+            now = time.monotonic()
+            for key in due:
+                deadline = self.deadlines.get(key)
+                if deadline is None:
+                    continue
+                if deadline > now:
+                    self._insert(key, deadline - now)
+                    continue
+                del self.deadlines[key]
+                task = asyncio.create_task(self.callback(key))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
@@ -0,0 +1,192 @@
+"""
+2048 的無頭批次模擬器
+
+一次用 NumPy 向量化地玩 N 局遊戲，規則跟 Twenty 完全相同（同一份 engine 的
+移動表），用來測量引擎的吞吐量，以及確認出現新方塊的分佈跟 Twenty.add_number
+一致。不需要連線到 Discord：
+
+    python -m twenty.simulate --games 10000 --policy greedy
+    python -m twenty.simulate --check-spawn
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from . import engine
+
+_U4 = np.uint64(0xF)
+_U16 = np.uint64(0xFFFF)
+_CELL_SHIFTS = np.arange(0, 64, 4, dtype=np.uint64)
+
+ROW_LEFT = np.array(engine.ROW_LEFT, dtype=np.uint64)
+ROW_RIGHT = np.array(engine.ROW_RIGHT, dtype=np.uint64)
+ROW_SCORE = np.array(engine.ROW_SCORE, dtype=np.int64)
+
+POLICIES = ("random", "greedy")
+
+
+def transpose(boards):
+    """engine.transpose 的向量化版本"""
+    a1 = boards & np.uint64(0xF0F00F0FF0F00F0F)
+    a2 = boards & np.uint64(0x0000F0F00000F0F0)
+    a3 = boards & np.uint64(0x0F0F00000F0F0000)
+    a = a1 | (a2 << np.uint64(12)) | (a3 >> np.uint64(12))
+    b1 = a & np.uint64(0xFF00FF0000FF00FF)
+    b2 = a & np.uint64(0x00FF00FF00000000)
+    b3 = a & np.uint64(0x00000000FF00FF00)
+    return b1 | (b2 >> np.uint64(24)) | (b3 << np.uint64(24))
+
+
+def _apply_rows(boards, table):
+    result = np.zeros_like(boards)
+    total = np.zeros(boards.shape, dtype=np.int64)
+    for shift in (np.uint64(0), np.uint64(16), np.uint64(32), np.uint64(48)):
+        rows = ((boards >> shift) & _U16).astype(np.intp)
+        result |= table[rows] << shift
+        total += ROW_SCORE[rows]
+    return result, total
+
+
+def all_moves(boards):
+    """
+    對每個棋盤同時算出四個方向的結果
+
+    回傳形狀為 (4, N) 的新棋盤與得分，順序同 engine.MOVES。
+    """
+    transposed = transpose(boards)
+    up, up_score = _apply_rows(transposed, ROW_LEFT)
+    down, down_score = _apply_rows(transposed, ROW_RIGHT)
+    left, left_score = _apply_rows(boards, ROW_LEFT)
+    right, right_score = _apply_rows(boards, ROW_RIGHT)
+    moved = np.stack([transpose(up), transpose(down), left, right])
+    scores = np.stack([up_score, down_score, left_score, right_score])
+    return moved, scores
+
+
+def ranks(boards):
+    """把棋盤拆成 (N, 16) 的指數陣列，第 4 * r + c 欄是第 r 列第 c 行"""
+    return ((boards[:, None] >> _CELL_SHIFTS) & _U4).astype(np.int8)
+
+
+def spawn(boards, rng):
+    """
+    在每個棋盤放一個新方塊，分佈跟 engine.spawn_tile 相同
+
+    從所有空格中均勻選一格，85/101 的機率是 2，其餘是 4。
+    棋盤必須至少有一個空格。
+    """
+    count = len(boards)
+    keys = np.where(ranks(boards) == 0, rng.random((count, 16)), -1.0)
+    cell = keys.argmax(axis=1)
+    rank = np.where(rng.integers(0, 101, count) < 85, 1, 2).astype(np.uint64)
+    return boards | (rank << (4 * cell).astype(np.uint64))
+
+
+def choose(moved, scores, boards, policy, rng):
+    """依策略為每個棋盤選一個合法的方向；沒有合法方向的回傳 -1"""
+    legal = moved != boards[None, :]
+    noise = rng.random(moved.shape)
+    if policy == "random":
+        keys = noise
+    elif policy == "greedy":
+        # Highest immediate score first, ties broken at random
+        keys = scores + noise
+    else:
+        raise ValueError(f"Unknown policy: {policy}")
+    keys = np.where(legal, keys, -1.0)
+    return np.where(legal.any(axis=0), keys.argmax(axis=0), -1)
+
+
+def simulate(games, policy="random", seed=None, max_moves=100000):
+    """
+    從 Twenty 的開局（右下角一個 2）同時玩 games 局直到全部結束
+
+    回傳每局的分數、最大方塊、步數，以及總共花費的秒數。
+    """
+    rng = np.random.default_rng(seed)
+    boards = np.full(games, engine.set_rank(0, 3, 3, 1), dtype=np.uint64)
+    score = np.zeros(games, dtype=np.int64)
+    moves = np.zeros(games, dtype=np.int64)
+    active = np.arange(games)
+    start = time.perf_counter()
+    for _ in range(max_moves):
+        if not len(active):
+            break
+        current = boards[active]
+        moved, gained = all_moves(current)
+        choice = choose(moved, gained, current, policy, rng)
+        alive = (choice >= 0).nonzero()[0]
+        active, choice = active[alive], choice[alive]
+        boards[active] = spawn(moved[choice, alive], rng)
+        score[active] += gained[choice, alive]
+        moves[active] += 1
+    elapsed = time.perf_counter() - start
+    max_tile = 1 << ranks(boards).max(axis=1).astype(np.int64)
+    return score, max_tile, moves, elapsed
+
+
+def check_spawn(samples=200000, seed=None):
+    """
+    比對向量化的 spawn 與 engine.spawn_tile（Twenty.add_number 使用的函式）
+
+    對同一個半滿的棋盤各抽樣 samples 次，回傳每種結果的頻率與最大差距。
+    """
+    board = engine.from_rows([[2, "_", 4, "_"], [2, 4, 8, 16], ["_", "_", "_", 2], [8, "_", 4, 2]])
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    vectorized = spawn(np.full(samples, board, dtype=np.uint64), rng)
+    outcomes, counts = np.unique(vectorized, return_counts=True)
+    vector_freq = dict(zip(outcomes.tolist(), (counts / samples).tolist()))
+    reference_freq = {}
+    for _ in range(samples):
+        outcome = engine.spawn_tile(board)
+        reference_freq[outcome] = reference_freq.get(outcome, 0) + 1 / samples
+    keys = set(vector_freq) | set(reference_freq)
+    deviation = max(abs(vector_freq.get(k, 0) - reference_freq.get(k, 0)) for k in keys)
+    return vector_freq, reference_freq, deviation
+
+
+def _report(score, max_tile, moves, elapsed):
+    total_moves = int(moves.sum())
+    print(f"games:        {len(score)}")
+    print(f"total moves:  {total_moves}")
+    print(f"elapsed:      {elapsed:.3f} s")
+    print(f"moves/sec:    {total_moves / elapsed:,.0f}")
+    percentiles = np.percentile(score, [0, 10, 25, 50, 75, 90, 100])
+    print("score:        mean {:.1f}, std {:.1f}".format(score.mean(), score.std()))
+    print(
+        "              min {:.0f} / p10 {:.0f} / p25 {:.0f} / median {:.0f} / "
+        "p75 {:.0f} / p90 {:.0f} / max {:.0f}".format(*percentiles)
+    )
+    print("max tile:")
+    tiles, counts = np.unique(max_tile, return_counts=True)
+    for tile, count in zip(tiles.tolist(), counts.tolist()):
+        print(f"  {tile:>6}  {count:>8}  {count / len(score):7.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless 2048 batch simulator")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--check-spawn", action="store_true", help="compare spawn odds with Twenty.add_number"
+    )
+    args = parser.parse_args(argv)
+    if args.check_spawn:
+        vector_freq, reference_freq, deviation = check_spawn(seed=args.seed)
+        for outcome in sorted(set(vector_freq) | set(reference_freq)):
+            print(
+                f"{outcome:#018x}  numpy {vector_freq.get(outcome, 0):.4f}  "
+                f"add_number {reference_freq.get(outcome, 0):.4f}"
+            )
+        print(f"max deviation: {deviation:.4f}")
+        return
+    _report(*simulate(args.games, args.policy, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+2048 的 expectimax 搜尋
+
+這個模組只依賴 engine，沒有任何 Discord 相關的東西，所以可以直接丟進
+process pool 裡執行，不會卡住 bot 的事件迴圈。
+"""
+
+import time
+
+from . import engine
+
+# Chance branches less likely than this are scored with the heuristic instead of expanded
+PROBABILITY_CUTOFF = 0.0001
+SPAWN_TWO = 85 / 101
+
+# Weights for the per-row heuristic, tuned for corner-stacking play
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def _row_heuristic(line):
+    empty = 0
+    merges = 0
+    prev = 0
+    counter = 0
+    total = 0.0
+    for rank in line:
+        total += rank**SUM_POWER
+        if rank == 0:
+            empty += 1
+            continue
+        if prev == rank:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        prev = rank
+    if counter > 0:
+        merges += 1 + counter
+
+    mono_left = 0.0
+    mono_right = 0.0
+    for a, b in zip(line, line[1:]):
+        if a > b:
+            mono_left += a**MONOTONICITY_POWER - b**MONOTONICITY_POWER
+        else:
+            mono_right += b**MONOTONICITY_POWER - a**MONOTONICITY_POWER
+
+    return (
+        LOST_PENALTY
+        + EMPTY_WEIGHT * empty
+        + MERGES_WEIGHT * merges
+        - MONOTONICITY_WEIGHT * min(mono_left, mono_right)
+        - SUM_WEIGHT * total
+    )
+
+
+HEURISTIC = [
+    _row_heuristic([(row >> shift) & 0xF for shift in (0, 4, 8, 12)]) for row in range(65536)
+]
+
+
+def evaluate(board):
+    """棋盤的啟發式分數：四列加四行的預算值"""
+    transposed = engine.transpose(board)
+    score = 0.0
+    for shift in (0, 16, 32, 48):
+        score += HEURISTIC[(board >> shift) & engine.ROW_MASK]
+        score += HEURISTIC[(transposed >> shift) & engine.ROW_MASK]
+    return score
+
+
+def spawn_cells(board):
+    """列出可能出現新方塊的位移量和機率，跟 engine.spawn_tile 的分佈一致"""
+    empty = engine.empty_cells(board)
+    shifts = []
+    while empty:
+        shifts.append((empty & -empty).bit_length() - 1)
+        empty &= empty - 1
+    return [(shift, 1 / len(shifts)) for shift in shifts]
+
+
+class _Search:
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.table = {}  # (board, depth) -> expected value
+        self.nodes = 0
+
+    def max_node(self, board, depth, probability):
+        best = 0.0
+        for direction in engine.MOVES:
+            moved, _ = engine.move(board, direction)
+            if moved != board:
+                best = max(best, self.chance_node(moved, depth, probability))
+        return best
+
+    def chance_node(self, board, depth, probability):
+        if depth <= 0 or probability < PROBABILITY_CUTOFF:
+            return evaluate(board)
+        key = (board, depth)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+        self.nodes += 1
+        if self.nodes & 0xF == 0 and time.monotonic() > self.deadline:
+            raise _OutOfTime
+        value = 0.0
+        for shift, chance in spawn_cells(board):
+            value += chance * SPAWN_TWO * self.max_node(
+                board | (1 << shift), depth - 1, probability * chance * SPAWN_TWO
+            )
+            value += chance * (1 - SPAWN_TWO) * self.max_node(
+                board | (2 << shift), depth - 1, probability * chance * (1 - SPAWN_TWO)
+            )
+        self.table[key] = value
+        return value
+
+
+def best_move(board, time_budget=1.0, max_depth=8):
+    """
+    以迭代加深的 expectimax 找出最佳移動
+
+    回傳 (方向, 完成的搜尋深度)；沒有任何合法移動時方向是 None。
+    時間用完時會放棄正在搜尋的那一層，改用上一層完整的結果。
+    """
+    deadline = time.monotonic() + time_budget
+    candidates = []
+    for direction in engine.MOVES:
+        moved, _ = engine.move(board, direction)
+        if moved != board:
+            candidates.append((direction, moved))
+    if not candidates:
+        return None, 0
+    if len(candidates) == 1:
+        return candidates[0][0], 0
+
+    choice, reached = candidates[0][0], 0
+    search = _Search(deadline)
+    for depth in range(1, max_depth + 1):
+        try:
+            scored = [
+                (search.chance_node(moved, depth, 1.0), direction)
+                for direction, moved in candidates
+            ]
+        except _OutOfTime:
+            break
+        choice, reached = max(scored)[1], depth
+        if time.monotonic() > deadline:
+            break
+    return choice, reached
@@ -0,0 +1,55 @@
+import discord
+
+from . import engine
+
+
+class TwentyView(discord.ui.View):
+    """
+    所有按鈕模式遊戲共用的持久 View
+
+    按鈕的 custom_id 固定，discord.py 會直接依 custom_id 找到這個 View，
+    再用訊息 ID 到 cog 的 sessions 找出對應的遊戲。
+    """
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        session = self.cog.sessions.get(interaction.message.id)
+        if session is None:
+            await interaction.response.send_message("這局遊戲已經結束了", ephemeral=True)
+            return False
+        if interaction.user.id != session.author_id:
+            await interaction.response.send_message("這不是你的遊戲", ephemeral=True)
+            return False
+        return True
+
+    async def _move(self, interaction: discord.Interaction, direction):
+        session = self.cog.sessions.get(interaction.message.id)
+        if session is not None:
+            await self.cog.button_move(interaction, session, direction)
+
+    @discord.ui.button(emoji="⬅", style=discord.ButtonStyle.secondary, custom_id="twenty:left")
+    async def left(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._move(interaction, engine.LEFT)
+
+    @discord.ui.button(emoji="⬆", style=discord.ButtonStyle.secondary, custom_id="twenty:up")
+    async def up(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._move(interaction, engine.UP)
+
+    @discord.ui.button(emoji="⬇", style=discord.ButtonStyle.secondary, custom_id="twenty:down")
+    async def down(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._move(interaction, engine.DOWN)
+
+    @discord.ui.button(emoji="➡", style=discord.ButtonStyle.secondary, custom_id="twenty:right")
+    async def right(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._move(interaction, engine.RIGHT)
+
+    @discord.ui.button(emoji="❌", style=discord.ButtonStyle.danger, custom_id="twenty:stop")
+    async def stop_game(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
+        session = self.cog.sessions.get(interaction.message.id)
+        if session is not None:
+            async with session.lock:
+                await self.cog.end_session(session, "遊戲結束")